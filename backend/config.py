@@ -32,11 +32,24 @@ class Settings(BaseSettings):
     min_overlap_score: float = 0.3
     min_photos_in_cluster: int = 1
 
+    # Pair faces on a photo with the optimal (Hungarian) assignment instead of
+    # greedy best-IoU-first. Requires scipy; ignored if it isn't installed.
+    optimal_face_assignment: bool = False
+
+    # Create supporting indexes on both databases at startup (see database.ensure_indexes).
+    # Disable if the databases must not be modified.
+    create_indexes: bool = True
+
     # Path mappings for converting Immich container paths to local filesystem paths.
     # Configure this in config.env as a JSON string, e.g.:
     # PATH_MAPPINGS='{"/external/photos": "C:/Users/you/Pictures"}'
     path_mappings: dict = {}
 
+    # Generated MS Photos face thumbnails are cached on disk here (relative to the webapp
+    # directory). Entries older than thumbnail_cache_max_age_days are removed at startup.
+    thumbnail_cache_dir: str = "cache/face_thumbs"
+    thumbnail_cache_max_age_days: int = 30
+
     class Config:
         env_file = "../config.env"
         env_file_encoding = "utf-8"
@@ -52,6 +65,15 @@ class Settings(BaseSettings):
         base = Path(__file__).parent.parent
         return (base / self.ms_photos_db).resolve()
 
+    @property
+    def thumbnail_cache_path(self) -> Path:
+        """Get absolute path to the face thumbnail cache directory."""
+        path = Path(self.thumbnail_cache_dir)
+        if path.is_absolute():
+            return path
+        base = Path(__file__).parent.parent
+        return (base / self.thumbnail_cache_dir).resolve()
+
     @property
     def immich_db_url(self) -> str:
         """Get PostgreSQL connection URL."""
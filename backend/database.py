@@ -3,46 +3,257 @@ Database access layer for MS Photos and Immich databases.
 """
 
 import sqlite3
+import threading
 import psycopg2
-from contextlib import contextmanager
-from typing import Generator
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from contextlib import closing, contextmanager
+from typing import Generator, Optional
 from config import (
+    get_settings,
     get_effective_ms_photos_db_path,
     get_effective_immich_db_config,
 )
 
 
-@contextmanager
-def get_ms_photos_connection() -> Generator[sqlite3.Connection, None, None]:
-    """Get connection to MS Photos SQLite database."""
-    db_path = get_effective_ms_photos_db_path()
-    conn = sqlite3.connect(db_path)
+# Indexes that turn the hot face/photo lookups into index scans.
+# All statements are idempotent so they can run on every startup.
+MS_PHOTOS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_face_personid ON Face(Face_PersonId)",
+    "CREATE INDEX IF NOT EXISTS idx_face_itemid ON Face(Face_ItemId)",
+    "CREATE INDEX IF NOT EXISTS idx_item_filename_lower ON Item(LOWER(Item_FileName), Item_FileSize)",
+    # Named people only; queries must spell the same predicate
+    # (Person_Name IS NOT NULL AND TRIM(Person_Name) != '') for SQLite to use it
+    """
+    CREATE INDEX IF NOT EXISTS idx_person_named ON Person(Person_Id, Person_Name)
+    WHERE Person_Name IS NOT NULL AND TRIM(Person_Name) != ''
+    """,
+]
+
+# Keyed by index name: a CONCURRENTLY build that fails halfway leaves an
+# INVALID index behind, which IF NOT EXISTS would skip forever
+IMMICH_INDEXES = {
+    "idx_af_live": """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_af_live ON asset_face ("assetId")
+    INCLUDE ("boundingBoxX1", "boundingBoxY1", "boundingBoxX2", "boundingBoxY2", "imageWidth", "imageHeight")
+    WHERE "deletedAt" IS NULL
+    """,
+    "idx_asset_filename_lower": 'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asset_filename_lower ON asset (LOWER("originalFileName"))',
+    "idx_person_named": """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_person_named ON person (id, name)
+    WHERE name IS NOT NULL AND name != ''
+    """,
+}
+
+
+# Maximum number of pooled Immich connections; extra concurrent callers get
+# a one-off connection instead of waiting
+IMMICH_POOL_MAX_CONNECTIONS = 8
+
+# Cached MS Photos connection, shared across threads and guarded by a lock.
+# Reopened whenever the configured database path changes.
+_ms_photos_lock = threading.RLock()
+_ms_photos_conn: Optional[sqlite3.Connection] = None
+_ms_photos_conn_path: Optional[str] = None
+
+# Immich connection pool, rebuilt whenever the database config changes. A
+# replaced pool is only closed once every caller using it is done, so
+# connections that are checked out keep working.
+_immich_pool_lock = threading.Lock()
+_immich_pool: Optional[ThreadedConnectionPool] = None
+_immich_pool_key: Optional[tuple] = None
+_immich_pool_users: dict[ThreadedConnectionPool, int] = {}
+
+
+def _open_ms_photos_connection(db_path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=False)
     conn.create_collation(
         "NoCaseUnicode",
         lambda x, y: (x.lower() > y.lower()) - (x.lower() < y.lower())
     )
     conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+    return conn
+
+
+@contextmanager
+def get_ms_photos_connection() -> Generator[sqlite3.Connection, None, None]:
+    """Get connection to MS Photos SQLite database."""
+    global _ms_photos_conn, _ms_photos_conn_path
+    
+    db_path = get_effective_ms_photos_db_path()
+    with _ms_photos_lock:
+        if _ms_photos_conn is None or _ms_photos_conn_path != str(db_path):
+            if _ms_photos_conn is not None:
+                _ms_photos_conn.close()
+                _ms_photos_conn = None
+            _ms_photos_conn = _open_ms_photos_connection(db_path)
+            _ms_photos_conn_path = str(db_path)
+        
+        conn = _ms_photos_conn
+        try:
+            yield conn
+        finally:
+            # Never hand an open transaction to the next caller
+            if conn.in_transaction:
+                conn.rollback()
+
+
+def _retire_immich_pool(pool: ThreadedConnectionPool) -> None:
+    """Close a pool that is no longer current once nobody uses it (call with _immich_pool_lock held)."""
+    if not _immich_pool_users.get(pool):
+        _immich_pool_users.pop(pool, None)
+        pool.closeall()
+
+
+def _acquire_immich_pool() -> ThreadedConnectionPool:
+    """
+    Return the Immich pool for the current config, creating it if needed.
+    
+    Registers the caller as a user of the pool; pair with _release_immich_pool.
+    """
+    global _immich_pool, _immich_pool_key
+    
+    db_config = get_effective_immich_db_config()
+    key = tuple(sorted(db_config.items()))
+    with _immich_pool_lock:
+        if _immich_pool is None or _immich_pool_key != key:
+            if _immich_pool is not None:
+                # Stop handing out the old pool's connections; close it when the last user is done
+                old_pool, _immich_pool = _immich_pool, None
+                _retire_immich_pool(old_pool)
+            _immich_pool = ThreadedConnectionPool(
+                1,
+                IMMICH_POOL_MAX_CONNECTIONS,
+                host=db_config["host"],
+                port=db_config["port"],
+                dbname=db_config["name"],
+                user=db_config["user"],
+                password=db_config["password"],
+            )
+            _immich_pool_key = key
+        _immich_pool_users[_immich_pool] = _immich_pool_users.get(_immich_pool, 0) + 1
+        return _immich_pool
+
+
+def _release_immich_pool(pool: ThreadedConnectionPool) -> None:
+    """Unregister a user of the pool, closing the pool if it was replaced meanwhile."""
+    with _immich_pool_lock:
+        _immich_pool_users[pool] -= 1
+        if pool is not _immich_pool:
+            _retire_immich_pool(pool)
 
 
 @contextmanager
 def get_immich_connection() -> Generator:
     """Get connection to Immich PostgreSQL database."""
-    db_config = get_effective_immich_db_config()
-    conn = psycopg2.connect(
-        host=db_config["host"],
-        port=db_config["port"],
-        dbname=db_config["name"],
-        user=db_config["user"],
-        password=db_config["password"],
-    )
+    pool = _acquire_immich_pool()
     try:
-        yield conn
+        try:
+            conn = pool.getconn()
+        except PoolError:
+            # Pool exhausted - fall back to an unpooled connection
+            db_config = get_effective_immich_db_config()
+            conn = psycopg2.connect(
+                host=db_config["host"],
+                port=db_config["port"],
+                dbname=db_config["name"],
+                user=db_config["user"],
+                password=db_config["password"],
+            )
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                # Reset session state before the connection is reused
+                try:
+                    conn.rollback()
+                    conn.autocommit = False
+                except psycopg2.Error:
+                    pass
+            pool.putconn(conn, close=bool(conn.closed))
     finally:
-        conn.close()
+        _release_immich_pool(pool)
+
+
+def close_connections() -> None:
+    """
+    Close the cached MS Photos connection and the Immich connection pool.
+    
+    Immich connections that are checked out stay usable; the pool is closed
+    when the last of them is returned.
+    """
+    global _ms_photos_conn, _ms_photos_conn_path, _immich_pool, _immich_pool_key
+    
+    with _ms_photos_lock:
+        if _ms_photos_conn is not None:
+            _ms_photos_conn.close()
+            _ms_photos_conn = None
+            _ms_photos_conn_path = None
+    
+    with _immich_pool_lock:
+        if _immich_pool is not None:
+            old_pool, _immich_pool = _immich_pool, None
+            _immich_pool_key = None
+            _retire_immich_pool(old_pool)
+
+
+def ensure_ms_photos_indexes() -> dict:
+    """Create supporting indexes on the MS Photos database (best effort)."""
+    db_path = get_effective_ms_photos_db_path()
+    if not db_path.exists():
+        return {"success": False, "error": f"Database not found: {db_path}"}
+    
+    try:
+        # Own connection: building indexes can take a while and must not hold
+        # the lock of the shared connection the endpoints use
+        with closing(_open_ms_photos_connection(db_path)) as conn:
+            for statement in MS_PHOTOS_INDEXES:
+                conn.execute(statement)
+            conn.commit()
+        return {"success": True, "indexes": len(MS_PHOTOS_INDEXES)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def ensure_immich_indexes() -> dict:
+    """Create supporting indexes on the Immich database (best effort)."""
+    try:
+        with get_immich_connection() as conn:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            conn.autocommit = True
+            cursor = conn.cursor()
+            
+            # Drop indexes left INVALID by an interrupted build so they are rebuilt below
+            cursor.execute("""
+                SELECT name
+                FROM unnest(%s::text[]) AS name
+                JOIN pg_index i ON i.indexrelid = to_regclass(name)
+                WHERE NOT i.indisvalid
+            """, (list(IMMICH_INDEXES),))
+            rebuilt = [row[0] for row in cursor.fetchall()]
+            for name in rebuilt:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            
+            for statement in IMMICH_INDEXES.values():
+                cursor.execute(statement)
+        return {"success": True, "indexes": len(IMMICH_INDEXES), "rebuilt": rebuilt}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def ensure_indexes() -> dict:
+    """Create supporting indexes on both databases unless disabled in settings."""
+    if not get_settings().create_indexes:
+        return {"skipped": True}
+    return {
+        "ms_photos": ensure_ms_photos_indexes(),
+        "immich": ensure_immich_indexes(),
+    }
 
 
 def test_ms_photos_connection() -> dict:
@@ -60,13 +271,13 @@ def test_ms_photos_connection() -> dict:
             
             cursor.execute("""
                 SELECT COUNT(*) FROM Person 
-                WHERE Person_Name IS NOT NULL AND Person_Name != '' AND TRIM(Person_Name) != ''
+                WHERE Person_Name IS NOT NULL AND TRIM(Person_Name) != ''
             """)
             named_persons = cursor.fetchone()[0]
             
             cursor.execute("""
                 SELECT COUNT(DISTINCT Person_Name) FROM Person 
-                WHERE Person_Name IS NOT NULL AND Person_Name != '' AND TRIM(Person_Name) != ''
+                WHERE Person_Name IS NOT NULL AND TRIM(Person_Name) != ''
             """)
             unique_named_persons = cursor.fetchone()[0]
             
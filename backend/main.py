@@ -4,14 +4,22 @@ Face Label Migration Tool - Web API
 FastAPI backend for the migration tool web interface.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
 import asyncio
+import threading
 from dataclasses import asdict
 
+# Optional: much faster JSON encoding for the large analysis payloads
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from config import (
     get_settings,
     get_current_config,
@@ -19,11 +27,22 @@ from config import (
     update_immich_api,
     update_immich_db,
 )
-from database import test_ms_photos_connection, test_immich_connection
+from database import test_ms_photos_connection, test_immich_connection, ensure_indexes, ensure_ms_photos_indexes, ensure_immich_indexes, close_connections
 from immich_client import get_immich_client
 from services.matching import find_face_position_matches, find_definitive_matches, find_unmatched_people, get_match_analytics, run_full_analysis, PersonMatch, UnmatchedPerson
 from services.cluster_validation import validate_clusters, find_mergeable_clusters, ClusterIssue
-from services.thumbnails import get_ms_person_thumbnail
+from services.thumbnails import (
+    get_cached_ms_person_thumbnail,
+    get_ms_person_thumbnail,
+    get_ms_person_thumbnail_key,
+    get_ms_person_thumbnails_batch,
+    get_ms_thumbnail_sprite,
+    build_ms_thumbnail_sprite,
+    invalidate_face_caches,
+    SPRITE_DEFAULT_COLUMNS,
+    THUMBNAIL_SIZE,
+    sweep_thumbnail_cache,
+)
 from services.match_details import get_detailed_face_matches, PhotoFaceMatch
 from services.apply_labels import find_unclustered_matches, preview_to_dict, get_unclustered_face_details, UnclusteredFaceDetail
 from services.create_faces import (
@@ -49,6 +68,38 @@ app.add_middleware(
 )
 
 
+def large_json_response(content: dict):
+    """
+    Encode a large analysis payload with orjson when it is installed.
+    
+    Without orjson the dict is returned unchanged for FastAPI to encode as usual.
+    """
+    if not HAS_ORJSON:
+        return content
+    return Response(
+        content=orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
+
+
+@app.on_event("startup")
+async def create_database_indexes():
+    """Create supporting database indexes in the background (can take a while on large libraries)."""
+    threading.Thread(target=ensure_indexes, daemon=True).start()
+
+
+@app.on_event("startup")
+async def clean_thumbnail_cache():
+    """Remove expired face thumbnails from the disk cache in the background."""
+    threading.Thread(target=sweep_thumbnail_cache, daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    """Close the cached MS Photos connection and the Immich connection pool."""
+    close_connections()
+
+
 # ============================================================================
 # Health & Status Endpoints
 # ============================================================================
@@ -105,8 +156,12 @@ class MSPhotosDbConfig(BaseModel):
 async def update_ms_photos_db_config(config: MSPhotosDbConfig):
     """Update MS Photos database path at runtime."""
     update_ms_photos_db(config.path)
+    invalidate_face_caches()
     # Test the new connection
     status = test_ms_photos_connection()
+    if status.get("connected") and get_settings().create_indexes:
+        # Building indexes can take minutes on a large library; don't block the event loop
+        threading.Thread(target=ensure_ms_photos_indexes, daemon=True).start()
     return {
         "success": status.get("connected", False),
         "status": status,
@@ -151,8 +206,12 @@ async def update_immich_db_config(config: ImmichDbConfig):
         user=config.user,
         password=config.password,
     )
+    invalidate_face_caches()
     # Test the new connection
     status = test_immich_connection()
+    if status.get("connected") and get_settings().create_indexes:
+        # Building indexes can take minutes on a large library; don't block the event loop
+        threading.Thread(target=ensure_immich_indexes, daemon=True).start()
     return {
         "success": status.get("connected", False),
         "status": status,
@@ -222,7 +281,7 @@ async def get_match_details(ms_person_id: int, immich_cluster_id: str, min_iou:
             "ms_person_id": ms_person_id,
             "immich_cluster_id": immich_cluster_id,
             "total_matches": len(matches),
-            "matches": [asdict(m) for m in matches],
+            "matches": matches.to_dicts(),
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -252,12 +311,12 @@ async def get_analytics():
     """
     Get raw matching analytics data for visualization.
     
-    Returns all potential matches (IoU > 0) with their scores,
+    Returns all potential matches (IoU > 0) with their scores as columns,
     plus histograms and suggested optimal thresholds.
     """
     try:
         result = get_match_analytics()
-        return result
+        return large_json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -279,11 +338,13 @@ async def run_algorithm(params: FullAnalysisParams):
     unclustered face previews all at once.
     """
     try:
+        # A fresh run also reloads the data behind the MS Photos thumbnails
+        invalidate_face_caches()
         result = run_full_analysis(
             min_iou=params.min_iou,
             max_center_dist=params.max_center_dist
         )
-        return result
+        return large_json_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -363,15 +424,119 @@ async def run_merge_analysis(params: MergeAnalysisParams):
 # Thumbnail Endpoints
 # ============================================================================
 
+# Browsers may reuse MS Photos thumbnails for a day before revalidating
+MS_THUMBNAIL_MAX_AGE = 86400
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the (quoted) ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in candidates)
+
+
 @app.get("/api/thumbnails/ms/{person_id}")
-async def get_ms_thumbnail(person_id: int):
-    """Get MS Photos person thumbnail (base64)."""
+async def get_ms_thumbnail(person_id: int, request: Request):
+    """
+    Get MS Photos person thumbnail (JPEG).
+    
+    Answers 304 Not Modified, without touching the thumbnail cache, when the
+    client already holds the current version (If-None-Match).
+    """
+    key = get_ms_person_thumbnail_key(person_id)
+    if key and etag_matches(request.headers.get("if-none-match"), f'"{key}"'):
+        return Response(
+            status_code=304,
+            headers={
+                "Cache-Control": f"public, max-age={MS_THUMBNAIL_MAX_AGE}",
+                "ETag": f'"{key}"',
+            },
+        )
+    
+    thumb = get_cached_ms_person_thumbnail(person_id)
+    if thumb:
+        key, thumb_bytes = thumb
+        return Response(
+            content=thumb_bytes,
+            media_type="image/jpeg",
+            headers={
+                "Cache-Control": f"public, max-age={MS_THUMBNAIL_MAX_AGE}",
+                "ETag": f'"{key}"',
+            },
+        )
+    raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+
+@app.get("/api/thumbnails/ms/{person_id}/base64")
+async def get_ms_thumbnail_base64(person_id: int):
+    """Get MS Photos person thumbnail (base64 in JSON)."""
     thumb = get_ms_person_thumbnail(person_id)
     if thumb:
         return {"thumbnail": thumb}
     raise HTTPException(status_code=404, detail="Thumbnail not found")
 
 
+class MSThumbnailBatchRequest(BaseModel):
+    person_ids: list[int]
+
+
+@app.post("/api/thumbnails/ms/batch")
+async def get_ms_thumbnails_batch(request: MSThumbnailBatchRequest):
+    """Get MS Photos thumbnails (base64) for several people; missing ones are omitted."""
+    return {"thumbnails": get_ms_person_thumbnails_batch(request.person_ids)}
+
+
+class MSThumbnailSpriteRequest(BaseModel):
+    person_ids: list[int]
+    columns: int = SPRITE_DEFAULT_COLUMNS
+
+
+@app.post("/api/thumbnails/ms/sprite")
+async def create_ms_thumbnail_sprite(request: MSThumbnailSpriteRequest):
+    """
+    Combine MS Photos thumbnails for several people into one sprite sheet.
+    
+    Returns the sheet's URL and each person's tile offset, for use with CSS
+    background-position; people without a thumbnail are omitted.
+    """
+    try:
+        sprite = build_ms_thumbnail_sprite(request.person_ids, request.columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not sprite:
+        raise HTTPException(status_code=404, detail="No thumbnails found")
+    
+    sprite_key, positions = sprite
+    return {
+        "atlas_url": f"/api/thumbnails/ms/sprite/{sprite_key}",
+        "tile_size": THUMBNAIL_SIZE,
+        "positions": positions,
+    }
+
+
+@app.get("/api/thumbnails/ms/sprite/{sprite_key}")
+async def get_ms_thumbnail_sprite_image(sprite_key: str):
+    """Get a sprite sheet (JPEG) made by POST /api/thumbnails/ms/sprite."""
+    sprite_bytes = get_ms_thumbnail_sprite(sprite_key)
+    if sprite_bytes:
+        # The key covers every face in the sheet, so its content never changes
+        return Response(
+            content=sprite_bytes,
+            media_type="image/jpeg",
+            headers={"Cache-Control": "public, max-age=31536000, immutable"},
+        )
+    raise HTTPException(status_code=404, detail="Sprite sheet not found")
+
+
+@app.post("/api/thumbnails/ms/refresh")
+async def refresh_ms_thumbnails():
+    """Reload the MS Photos face data and Immich photo paths behind the thumbnails."""
+    invalidate_face_caches()
+    return {"success": True}
+
+
 @app.get("/api/thumbnails/immich/{person_id}")
 async def get_immich_thumbnail(person_id: str):
     """Get Immich cluster thumbnail."""
@@ -837,7 +1002,6 @@ async def get_orphan_people():
                     (SELECT COUNT(*) FROM FaceCluster fc WHERE fc.FaceCluster_PersonId = p.Person_Id) as has_cluster
                 FROM Person p
                 WHERE p.Person_Name IS NOT NULL 
-                  AND p.Person_Name != '' 
                   AND TRIM(p.Person_Name) != ''
                 ORDER BY p.Person_ItemCount DESC
             """)
@@ -0,0 +1,85 @@
+"""
+Generate the MS Photos face thumbnails ahead of time.
+
+Usage (from the backend directory):
+    python scripts/prebuild_face_thumbs.py
+
+Fills the thumbnail disk cache (THUMBNAIL_CACHE_DIR) for every person, so
+the thumbnail endpoints only ever read finished files, and writes a manifest
+of (person_id, cache_key, path) next to the cache directory, e.g.
+cache/face_thumbs.parquet, for serving the files statically. The manifest is
+Parquet when pyarrow is installed and CSV otherwise; paths are relative to
+the manifest. Thumbnails are regenerated on demand when a photo changes, so
+the manifest is a snapshot of the last run.
+"""
+
+import csv
+import os
+import sys
+import time
+
+# Optional: Parquet manifest (falls back to CSV)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_settings
+from services.thumbnails import get_cached_ms_person_thumbnails, get_person_path_index
+
+# People per batch; each batch is decoded in parallel on the thumbnail thread pool
+BATCH_SIZE = 500
+
+
+def prebuild_face_thumbnails() -> list[tuple[int, str, str]]:
+    """Make sure every person's thumbnail is in the disk cache; returns the manifest rows."""
+    cache_dir = get_settings().thumbnail_cache_path
+    person_ids = sorted(get_person_path_index())
+    rows = []
+    
+    for start in range(0, len(person_ids), BATCH_SIZE):
+        thumbnails = get_cached_ms_person_thumbnails(person_ids[start:start + BATCH_SIZE])
+        for person_id, (key, _) in sorted(thumbnails.items()):
+            path = cache_dir / f"{key}.jpg"
+            try:
+                os.utime(path)  # restart the cache max-age for thumbnails that were already cached
+            except OSError:
+                continue  # cache not writable; nothing to list
+            rows.append((person_id, key, f"{cache_dir.name}/{path.name}"))
+        print(f"  {min(start + BATCH_SIZE, len(person_ids))}/{len(person_ids)} people, {len(rows)} thumbnails")
+    
+    return rows
+
+
+def write_manifest(rows: list[tuple[int, str, str]]) -> str:
+    """Write the manifest next to the cache directory; returns its path."""
+    cache_dir = get_settings().thumbnail_cache_path
+    
+    if HAS_PYARROW:
+        manifest_path = cache_dir.with_name(f"{cache_dir.name}.parquet")
+        person_ids, keys, paths = zip(*rows) if rows else ((), (), ())
+        table = pa.table({
+            "person_id": pa.array(person_ids, type=pa.int64()),
+            "cache_key": pa.array(keys, type=pa.string()),
+            "path": pa.array(paths, type=pa.string()),
+        })
+        pq.write_table(table, manifest_path)
+    else:
+        manifest_path = cache_dir.with_name(f"{cache_dir.name}.csv")
+        with open(manifest_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "cache_key", "path"])
+            writer.writerows(rows)
+    
+    return str(manifest_path)
+
+
+if __name__ == "__main__":
+    print(f"Building face thumbnails in {get_settings().thumbnail_cache_path}")
+    started = time.perf_counter()
+    rows = prebuild_face_thumbnails()
+    manifest_path = write_manifest(rows)
+    print(f"Done: {len(rows)} thumbnails in {time.perf_counter() - started:.1f}s, manifest: {manifest_path}")
@@ -0,0 +1,66 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled greedy face assignment.
+
+Build in place with `python setup_kernels.py build_ext --inplace` (needs
+Cython and a C compiler). services.matching.greedy_match uses it when the
+extension is importable and falls back to pure Python otherwise.
+"""
+
+import numpy as np
+
+
+def greedy_select(double[:, ::1] iou, double[:, ::1] cd, double min_iou, double max_cd):
+    """
+    Same contract as services.matching.greedy_match: pairs passing both
+    thresholds are taken in descending IoU order (ties keep row-major order),
+    skipping faces that were already matched.
+    
+    Returns:
+        (row, col) index pairs in the order they were accepted
+    """
+    cdef Py_ssize_t n = iou.shape[0]
+    cdef Py_ssize_t m = iou.shape[1]
+    cdef Py_ssize_t i, j, k, idx
+    cdef Py_ssize_t count = 0
+    
+    cand_rows = np.empty(n * m, dtype=np.intp)
+    cand_cols = np.empty(n * m, dtype=np.intp)
+    cand_iou = np.empty(n * m, dtype=np.float64)
+    cdef Py_ssize_t[::1] rows = cand_rows
+    cdef Py_ssize_t[::1] cols = cand_cols
+    cdef double[::1] scores = cand_iou
+    
+    # Both criteria must be satisfied (AND logic)
+    for i in range(n):
+        for j in range(m):
+            if iou[i, j] >= min_iou and cd[i, j] <= max_cd:
+                rows[count] = i
+                cols[count] = j
+                scores[count] = iou[i, j]
+                count += 1
+    
+    if count == 0:
+        return []
+    
+    # Stable argsort on negated IoU keeps equal scores in row-major order
+    order_arr = np.argsort(-cand_iou[:count], kind="stable")
+    cdef Py_ssize_t[::1] order = order_arr
+    
+    used_rows_arr = np.zeros(n, dtype=np.uint8)
+    used_cols_arr = np.zeros(m, dtype=np.uint8)
+    cdef unsigned char[::1] used_rows = used_rows_arr
+    cdef unsigned char[::1] used_cols = used_cols_arr
+    
+    pairs = []
+    for k in range(count):
+        idx = order[k]
+        i = rows[idx]
+        j = cols[idx]
+        if used_rows[i] or used_cols[j]:
+            continue  # This face already matched with a better candidate
+        used_rows[i] = 1
+        used_cols[j] = 1
+        pairs.append((i, j))
+    
+    return pairs
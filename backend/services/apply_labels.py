@@ -12,10 +12,12 @@ import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import get_ms_photos_connection, get_immich_connection
+from database import get_immich_connection
 from services.matching import (
-    calculate_iou, 
+    calculate_iou_with_areas, 
     calculate_center_distance, 
+    rect_area,
+    iter_named_ms_faces,
     ms_rect_to_normalized,
     immich_rect_to_normalized
 )
@@ -89,47 +91,25 @@ def find_unclustered_matches(min_iou: float = 0.3, max_center_dist: float = 0.4)
     # ==========================================================================
     # Step 1: Load MS Photos faces with positions
     # ==========================================================================
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                i.Item_FileSize,
-                p.Person_Id,
-                p.Person_Name,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
-              AND TRIM(p.Person_Name) != ''
-              AND f.Face_Rect_Top IS NOT NULL
-        """)
-        
-        # Index by (filename, filesize) for photo matching
-        ms_faces_by_photo = defaultdict(list)
-        ms_people = {}
-        ms_face_counts = defaultdict(int)
+    # Index by (filename, filesize) for photo matching
+    ms_faces_by_photo = defaultdict(list)
+    ms_people = {}
+    ms_face_counts = defaultdict(int)
+    
+    for filename, filesize, person_id, person_name, top, left, width, height in iter_named_ms_faces():
+        if not filename or not filesize:
+            continue
         
-        for row in ms_cursor.fetchall():
-            filename, filesize, person_id, person_name, top, left, width, height = row
-            if not filename or not filesize:
-                continue
-            
-            key = (filename.lower(), filesize)
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append({
-                "person_id": person_id,
-                "person_name": person_name,
-                "rect": rect,
-            })
-            ms_people[person_id] = person_name
-            ms_face_counts[person_id] += 1
+        key = (filename.lower(), filesize)
+        rect = ms_rect_to_normalized(top, left, width, height)
+        ms_faces_by_photo[key].append({
+            "person_id": person_id,
+            "person_name": person_name,
+            "rect": rect,
+            "area": rect_area(rect),
+        })
+        ms_people[person_id] = person_name
+        ms_face_counts[person_id] += 1
     
     # ==========================================================================
     # Step 2: Load UNCLUSTERED Immich faces (personId IS NULL)
@@ -175,6 +155,7 @@ def find_unclustered_matches(min_iou: float = 0.3, max_center_dist: float = 0.4)
                 "face_id": str(face_id),
                 "asset_id": str(asset_id),
                 "rect": rect,
+                "area": rect_area(rect),
             })
         
         # Also get existing Immich people to check for name matches
@@ -202,10 +183,12 @@ def find_unclustered_matches(min_iou: float = 0.3, max_center_dist: float = 0.4)
         
         for ms_idx, ms_face in enumerate(ms_faces):
             for imm_idx, imm_face in enumerate(unclustered_faces):
-                iou = calculate_iou(ms_face["rect"], imm_face["rect"])
+                iou = calculate_iou_with_areas(ms_face["rect"], imm_face["rect"], ms_face["area"], imm_face["area"])
+                if iou < min_iou:
+                    continue
                 center_dist = calculate_center_distance(ms_face["rect"], imm_face["rect"])
                 
-                if iou >= min_iou and center_dist <= max_center_dist:
+                if center_dist <= max_center_dist:
                     potential_matches.append((
                         iou, center_dist, ms_idx, imm_idx, ms_face, imm_face
                     ))
@@ -12,11 +12,13 @@ import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import get_ms_photos_connection, get_immich_connection
+from database import get_immich_connection
 # Import shared matching utilities - single source of truth
 from services.matching import (
-    calculate_iou, 
+    calculate_iou_with_areas, 
     calculate_center_distance, 
+    rect_area,
+    iter_named_ms_faces,
     ms_rect_to_normalized,
     immich_rect_to_normalized
 )
@@ -62,34 +64,12 @@ def validate_clusters(min_iou: float = 0.3, max_center_dist: float = 0.4, min_fa
         ValidationResult with issues found
     """
     # Load MS Photos faces indexed by (filename, face_position)
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                p.Person_Id,
-                p.Person_Name,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
-              AND TRIM(p.Person_Name) != ''
-              AND f.Face_Rect_Top IS NOT NULL
-        """)
-        
-        # Build: filename -> list of (person_id, person_name, rect)
-        ms_faces_by_photo = defaultdict(list)
-        for row in ms_cursor.fetchall():
-            filename, person_id, person_name, top, left, width, height = row
-            key = filename.lower()
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append((person_id, person_name, rect))
+    # Build: filename -> list of (person_id, person_name, rect)
+    ms_faces_by_photo = defaultdict(list)
+    for filename, _, person_id, person_name, top, left, width, height in iter_named_ms_faces():
+        key = filename.lower()
+        rect = ms_rect_to_normalized(top, left, width, height)
+        ms_faces_by_photo[key].append((person_id, person_name, rect, rect_area(rect)))
     
     # Load Immich faces grouped by cluster
     with get_immich_connection() as immich_conn:
@@ -149,13 +129,16 @@ def validate_clusters(min_iou: float = 0.3, max_center_dist: float = 0.4, min_fa
                 immich_rect = immich_rect_to_normalized(x1, y1, x2, y2, img_w, img_h)
                 if not immich_rect:
                     continue
+                immich_area = rect_area(immich_rect)
                 
                 # Find matching MS Photos face
                 if key in ms_faces_by_photo:
-                    for ms_person_id, ms_person_name, ms_rect in ms_faces_by_photo[key]:
-                        iou = calculate_iou(ms_rect, immich_rect)
+                    for ms_person_id, ms_person_name, ms_rect, ms_area in ms_faces_by_photo[key]:
+                        iou = calculate_iou_with_areas(ms_rect, immich_rect, ms_area, immich_area)
+                        if iou < min_iou:
+                            continue
                         center_dist = calculate_center_distance(ms_rect, immich_rect)
-                        if iou >= min_iou and center_dist <= max_center_dist:
+                        if center_dist <= max_center_dist:
                             ms_people_found[ms_person_id].append((ms_person_name, filename))
                             matched_faces += 1
                             if len(sample_photos) < 5:
@@ -251,38 +234,16 @@ def find_mergeable_clusters(min_iou: float = 0.3, max_center_dist: float = 0.4,
         MergeAnalysisResult with merge candidates
     """
     # Load all MS Photos faces with person info
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                p.Person_Id,
-                p.Person_Name,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
-              AND TRIM(p.Person_Name) != ''
-              AND f.Face_Rect_Top IS NOT NULL
-        """)
-        
-        # Build: filename -> list of (person_id, person_name, rect)
-        ms_faces_by_photo = defaultdict(list)
-        ms_person_face_counts = defaultdict(lambda: {"name": "", "count": 0})
-        
-        for row in ms_cursor.fetchall():
-            filename, person_id, person_name, top, left, width, height = row
-            key = filename.lower()
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append((person_id, person_name, rect))
-            ms_person_face_counts[person_id]["name"] = person_name
-            ms_person_face_counts[person_id]["count"] += 1
+    # Build: filename -> list of (person_id, person_name, rect)
+    ms_faces_by_photo = defaultdict(list)
+    ms_person_face_counts = defaultdict(lambda: {"name": "", "count": 0})
+    
+    for filename, _, person_id, person_name, top, left, width, height in iter_named_ms_faces():
+        key = filename.lower()
+        rect = ms_rect_to_normalized(top, left, width, height)
+        ms_faces_by_photo[key].append((person_id, person_name, rect, rect_area(rect)))
+        ms_person_face_counts[person_id]["name"] = person_name
+        ms_person_face_counts[person_id]["count"] += 1
     
     # Load all Immich faces with their cluster info
     with get_immich_connection() as immich_conn:
@@ -327,13 +288,16 @@ def find_mergeable_clusters(min_iou: float = 0.3, max_center_dist: float = 0.4,
             immich_rect = immich_rect_to_normalized(x1, y1, x2, y2, img_w, img_h)
             if not immich_rect:
                 continue
+            immich_area = rect_area(immich_rect)
             
             # Match to MS Photos faces
             if key in ms_faces_by_photo:
-                for ms_person_id, ms_person_name, ms_rect in ms_faces_by_photo[key]:
-                    iou = calculate_iou(ms_rect, immich_rect)
+                for ms_person_id, ms_person_name, ms_rect, ms_area in ms_faces_by_photo[key]:
+                    iou = calculate_iou_with_areas(ms_rect, immich_rect, ms_area, immich_area)
+                    if iou < min_iou:
+                        continue
                     center_dist = calculate_center_distance(ms_rect, immich_rect)
-                    if iou >= min_iou and center_dist <= max_center_dist:
+                    if center_dist <= max_center_dist:
                         ms_to_immich_mapping[ms_person_id][cluster_id] += 1
                         break
     
@@ -6,21 +6,87 @@ functionality to create them via the Immich API.
 """
 
 from collections import defaultdict
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional
 import sys
 import os
 
+import numpy as np
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import get_ms_photos_connection, get_immich_connection
+from database import get_immich_connection
 from services.matching import (
-    calculate_iou, 
     calculate_center_distance, 
+    iter_named_ms_faces,
     ms_rect_to_normalized,
-    immich_rect_to_normalized
+    immich_rect_to_normalized,
+    rect_area,
 )
 
 
+# Photos with at least this many Immich faces (group shots) get a spatial grid
+# so each MS face is only tested against faces in the cells it covers.
+GRID_SIZE = 8
+GRID_MIN_FACES = 8
+
+
+def _grid_cells(rect: tuple) -> list[tuple[int, int]]:
+    """Return the (column, row) grid cells covered by a normalized rect."""
+    x1, y1, x2, y2 = rect
+    last = GRID_SIZE - 1
+    col1 = min(max(int(x1 * GRID_SIZE), 0), last)
+    row1 = min(max(int(y1 * GRID_SIZE), 0), last)
+    col2 = min(max(int(x2 * GRID_SIZE), 0), last)
+    row2 = min(max(int(y2 * GRID_SIZE), 0), last)
+    return [(col, row) for col in range(col1, col2 + 1) for row in range(row1, row2 + 1)]
+
+
+def _build_face_grid(rects: list[tuple]) -> dict[tuple[int, int], list[int]]:
+    """
+    Bucket face indices by every grid cell their rect covers.
+    
+    Two rects with a positive intersection always share at least one cell,
+    so looking up the cells of an MS face never misses an overlapping face.
+    """
+    grid = defaultdict(list)
+    for idx, rect in enumerate(rects):
+        for cell in _grid_cells(rect):
+            grid[cell].append(idx)
+    return grid
+
+
+def _has_overlapping_face(
+    ms_rect: tuple,
+    ms_area: float,
+    imm_rects: np.ndarray,
+    imm_areas: np.ndarray,
+    min_iou: float,
+) -> bool:
+    """
+    Check whether any row of imm_rects (N, 4) overlaps ms_rect with IoU >= min_iou.
+    
+    Areas are passed in precomputed so they are not recomputed per comparison.
+    """
+    if min_iou <= 0:
+        return len(imm_rects) > 0
+    
+    x1, y1, x2, y2 = ms_rect
+    
+    # Gate on horizontal overlap first; only survivors get the full IoU
+    iw = np.minimum(x2, imm_rects[:, 2]) - np.maximum(x1, imm_rects[:, 0])
+    hit = np.where(iw > 0)[0]
+    if hit.size == 0:
+        return False
+    
+    candidates = imm_rects[hit]
+    ih = np.minimum(y2, candidates[:, 3]) - np.maximum(y1, candidates[:, 1])
+    intersection = iw[hit] * np.clip(ih, 0, None)
+    union = ms_area + imm_areas[hit] - intersection
+    iou = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return bool((iou >= min_iou).any())
+
+
 @dataclass
 class UnrecognizedFace:
     """An MS Photos face that has no matching Immich face detection."""
@@ -41,6 +107,113 @@ class UnrecognizedFace:
     image_height: int
 
 
+# Column names of the per-person face buffers built during matching
+FACE_COLUMNS = ("ms_rect", "immich_asset_id", "filename", "file_size", "image_width", "image_height")
+
+
+@dataclass
+class UnrecognizedFaceBatch:
+    """
+    All unrecognized faces of one MS Photos person, stored column-wise.
+    
+    Row i of every column describes one face. UnrecognizedFace objects are
+    only materialized on indexing/iteration, e.g. for the details view.
+    """
+    ms_person_id: int
+    ms_person_name: str
+    ms_rects: np.ndarray  # (N, 4) normalized (x1, y1, x2, y2)
+    immich_asset_ids: list[str]
+    filenames: list[str]
+    file_sizes: np.ndarray  # (N,) int64
+    image_widths: np.ndarray  # (N,) int64
+    image_heights: np.ndarray  # (N,) int64
+    
+    @classmethod
+    def from_columns(cls, ms_person_id: int, ms_person_name: str, columns: dict[str, list]) -> "UnrecognizedFaceBatch":
+        """Build a batch from per-column Python lists (see FACE_COLUMNS)."""
+        return cls(
+            ms_person_id=ms_person_id,
+            ms_person_name=ms_person_name,
+            ms_rects=np.array(columns["ms_rect"], dtype=np.float64).reshape(-1, 4),
+            immich_asset_ids=columns["immich_asset_id"],
+            filenames=columns["filename"],
+            file_sizes=np.array(columns["file_size"], dtype=np.int64),
+            image_widths=np.array(columns["image_width"], dtype=np.int64),
+            image_heights=np.array(columns["image_height"], dtype=np.int64),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.filenames)
+    
+    def __getitem__(self, i: int) -> UnrecognizedFace:
+        return UnrecognizedFace(
+            ms_person_id=self.ms_person_id,
+            ms_person_name=self.ms_person_name,
+            ms_rect=tuple(self.ms_rects[i].tolist()),
+            immich_asset_id=self.immich_asset_ids[i],
+            filename=self.filenames[i],
+            file_size=int(self.file_sizes[i]),
+            image_width=int(self.image_widths[i]),
+            image_height=int(self.image_heights[i]),
+        )
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _find_unrecognized_in_photos(
+    photo_keys: list[tuple],
+    ms_faces_by_photo: dict,
+    immich_faces_by_photo: dict,
+    assets_by_photo: dict,
+    asset_dimensions: dict,
+    min_iou: float,
+) -> dict[int, dict[str, list]]:
+    """
+    Find the MS Photos faces on the given photos that no Immich face overlaps.
+    
+    Returns:
+        MS person ID -> column lists (see FACE_COLUMNS) of their unrecognized faces
+    """
+    columns_by_person = defaultdict(lambda: {name: [] for name in FACE_COLUMNS})
+    
+    for photo_key in photo_keys:
+        filename, file_size = photo_key
+        ms_faces = ms_faces_by_photo[photo_key]
+        immich_faces = immich_faces_by_photo.get(photo_key, [])
+        asset_id = assets_by_photo[photo_key]
+        
+        imm_rects = np.array([f["rect"] for f in immich_faces], dtype=np.float64).reshape(-1, 4)
+        imm_areas = (imm_rects[:, 2] - imm_rects[:, 0]) * (imm_rects[:, 3] - imm_rects[:, 1])
+        # With min_iou <= 0 any Immich face on the photo counts, even one in no shared cell
+        use_grid = min_iou > 0 and len(immich_faces) >= GRID_MIN_FACES
+        grid = _build_face_grid([f["rect"] for f in immich_faces]) if use_grid else None
+        
+        # For each MS Photos face, check if there's any overlapping Immich face
+        for ms_face in ms_faces:
+            if grid is not None:
+                nearby = sorted({idx for cell in _grid_cells(ms_face["rect"]) for idx in grid.get(cell, ())})
+                candidates, candidate_areas = imm_rects[nearby], imm_areas[nearby]
+            else:
+                candidates, candidate_areas = imm_rects, imm_areas
+            
+            # Use the threshold to determine if this is "the same face"
+            if not _has_overlapping_face(ms_face["rect"], ms_face["area"], candidates, candidate_areas, min_iou):
+                # This MS Photos face has no corresponding Immich face
+                dims = asset_dimensions.get(asset_id, (1920, 1080))
+                
+                columns = columns_by_person[ms_face["person_id"]]
+                columns["ms_rect"].append(ms_face["rect"])
+                columns["immich_asset_id"].append(asset_id)
+                columns["filename"].append(filename)
+                columns["file_size"].append(file_size)
+                columns["image_width"].append(dims[0])
+                columns["image_height"].append(dims[1])
+    
+    return columns_by_person
+
+
 @dataclass
 class UnrecognizedPersonPreview:
     """Preview of unrecognized faces for one MS Photos person."""
@@ -52,14 +225,14 @@ class UnrecognizedPersonPreview:
     existing_immich_person_name: Optional[str] = None
     
     # Faces to create
-    faces_to_create: list[UnrecognizedFace] = field(default_factory=list)
+    faces_to_create: Optional[UnrecognizedFaceBatch] = None
     
     # Stats
     total_faces_in_ms_photos: int = 0
     
     @property
     def face_count(self) -> int:
-        return len(self.faces_to_create)
+        return len(self.faces_to_create) if self.faces_to_create is not None else 0
     
     @property
     def needs_person_creation(self) -> bool:
@@ -83,47 +256,25 @@ def find_unrecognized_faces(min_iou: float = 0.3) -> dict:
     # ==========================================================================
     # Step 1: Load MS Photos faces with positions
     # ==========================================================================
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                i.Item_FileSize,
-                p.Person_Id,
-                p.Person_Name,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
-              AND TRIM(p.Person_Name) != ''
-              AND f.Face_Rect_Top IS NOT NULL
-        """)
-        
-        # Index by (filename, filesize) for photo matching
-        ms_faces_by_photo = defaultdict(list)
-        ms_people = {}
-        ms_face_counts = defaultdict(int)
+    # Index by (filename, filesize) for photo matching
+    ms_faces_by_photo = defaultdict(list)
+    ms_people = {}
+    ms_face_counts = defaultdict(int)
+    
+    for filename, filesize, person_id, person_name, top, left, width, height in iter_named_ms_faces():
+        if not filename or not filesize:
+            continue
         
-        for row in ms_cursor.fetchall():
-            filename, filesize, person_id, person_name, top, left, width, height = row
-            if not filename or not filesize:
-                continue
-            
-            key = (filename.lower(), filesize)
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append({
-                "person_id": person_id,
-                "person_name": person_name,
-                "rect": rect,
-            })
-            ms_people[person_id] = person_name
-            ms_face_counts[person_id] += 1
+        key = (filename.lower(), filesize)
+        rect = ms_rect_to_normalized(top, left, width, height)
+        ms_faces_by_photo[key].append({
+            "person_id": person_id,
+            "person_name": person_name,
+            "rect": rect,
+            "area": rect_area(rect),
+        })
+        ms_people[person_id] = person_name
+        ms_face_counts[person_id] += 1
     
     # ==========================================================================
     # Step 2: Load ALL Immich faces (both clustered and unclustered)
@@ -207,44 +358,35 @@ def find_unrecognized_faces(min_iou: float = 0.3) -> dict:
     # Step 3: Find MS Photos faces with no matching Immich face
     # ==========================================================================
     # We check photos that are in both systems
-    common_photos = set(ms_faces_by_photo.keys()) & set(assets_by_photo.keys())
+    common_photos = ms_faces_by_photo.keys() & assets_by_photo.keys()
     
-    # Group unrecognized faces by MS Photos person
-    unrecognized_by_person: dict[int, list[UnrecognizedFace]] = defaultdict(list)
+    # Photos are independent and the overlap test runs in NumPy (which
+    # releases the GIL), so fan chunks of photos out across threads
+    photo_keys = list(common_photos)
+    workers = max(1, min(os.cpu_count() or 1, len(photo_keys)))
+    chunk_size = max(1, -(-len(photo_keys) // workers))  # ceil division
+    chunks = [photo_keys[i:i + chunk_size] for i in range(0, len(photo_keys), chunk_size)]
     
-    for photo_key in common_photos:
-        filename, file_size = photo_key
-        ms_faces = ms_faces_by_photo[photo_key]
-        immich_faces = all_immich_faces_by_photo.get(photo_key, [])
-        asset_id = assets_by_photo[photo_key]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunk_results = executor.map(
+            lambda chunk: _find_unrecognized_in_photos(
+                chunk, ms_faces_by_photo, all_immich_faces_by_photo,
+                assets_by_photo, asset_dimensions, min_iou,
+            ),
+            chunks,
+        )
         
-        # For each MS Photos face, check if there's any overlapping Immich face
-        for ms_face in ms_faces:
-            has_matching_immich_face = False
-            
-            for imm_face in immich_faces:
-                iou = calculate_iou(ms_face["rect"], imm_face["rect"])
-                
-                # Use the threshold to determine if this is "the same face"
-                if iou >= min_iou:
-                    has_matching_immich_face = True
-                    break
-            
-            if not has_matching_immich_face:
-                # This MS Photos face has no corresponding Immich face
-                dims = asset_dimensions.get(asset_id, (1920, 1080))
-                
-                unrecognized = UnrecognizedFace(
-                    ms_person_id=ms_face["person_id"],
-                    ms_person_name=ms_face["person_name"],
-                    ms_rect=ms_face["rect"],
-                    immich_asset_id=asset_id,
-                    filename=filename,
-                    file_size=file_size,
-                    image_width=dims[0],
-                    image_height=dims[1],
-                )
-                unrecognized_by_person[ms_face["person_id"]].append(unrecognized)
+        # Group unrecognized faces by MS Photos person
+        columns_by_person = defaultdict(lambda: {name: [] for name in FACE_COLUMNS})
+        for chunk_columns in chunk_results:
+            for person_id, columns in chunk_columns.items():
+                for name in FACE_COLUMNS:
+                    columns_by_person[person_id][name].extend(columns[name])
+    
+    unrecognized_by_person: dict[int, UnrecognizedFaceBatch] = {
+        person_id: UnrecognizedFaceBatch.from_columns(person_id, ms_people[person_id], columns)
+        for person_id, columns in columns_by_person.items()
+    }
     
     # ==========================================================================
     # Step 4: Build preview for each person
@@ -273,9 +415,9 @@ def find_unrecognized_faces(min_iou: float = 0.3) -> dict:
     # Compute stats
     total_unrecognized_faces = sum(p.face_count for p in previews)
     total_photos_with_unrecognized = len(set(
-        (f.filename, f.file_size) 
+        photo
         for p in previews 
-        for f in p.faces_to_create
+        for photo in zip(p.faces_to_create.filenames, p.faces_to_create.file_sizes.tolist())
     ))
     people_needing_creation = sum(1 for p in previews if p.needs_person_creation)
     people_existing = sum(1 for p in previews if not p.needs_person_creation)
@@ -295,6 +437,12 @@ def find_unrecognized_faces(min_iou: float = 0.3) -> dict:
 
 def preview_to_dict(preview: UnrecognizedPersonPreview) -> dict:
     """Convert a preview to a JSON-serializable dict."""
+    faces = preview.faces_to_create
+    # Convert each column to Python values once rather than per face
+    rects = faces.ms_rects.tolist()
+    widths = faces.image_widths.tolist()
+    heights = faces.image_heights.tolist()
+    
     return {
         "ms_person_id": preview.ms_person_id,
         "ms_person_name": preview.ms_person_name,
@@ -305,18 +453,18 @@ def preview_to_dict(preview: UnrecognizedPersonPreview) -> dict:
         "total_faces_in_ms_photos": preview.total_faces_in_ms_photos,
         "faces": [
             {
-                "immich_asset_id": f.immich_asset_id,
-                "filename": f.filename,
-                "ms_rect_x1": f.ms_rect[0],
-                "ms_rect_y1": f.ms_rect[1],
-                "ms_rect_x2": f.ms_rect[2],
-                "ms_rect_y2": f.ms_rect[3],
-                "image_width": f.image_width,
-                "image_height": f.image_height,
+                "immich_asset_id": faces.immich_asset_ids[i],
+                "filename": faces.filenames[i],
+                "ms_rect_x1": rects[i][0],
+                "ms_rect_y1": rects[i][1],
+                "ms_rect_x2": rects[i][2],
+                "ms_rect_y2": rects[i][3],
+                "image_width": widths[i],
+                "image_height": heights[i],
             }
-            for f in preview.faces_to_create
+            for i in range(len(faces))
         ],
-        "sample_filenames": list(set(f.filename for f in preview.faces_to_create))[:5],
+        "sample_filenames": list(set(faces.filenames))[:5],
     }
 
 
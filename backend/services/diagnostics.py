@@ -59,22 +59,24 @@ def find_missing_people() -> dict:
         """)
         immich_names = set(row[0] for row in cursor.fetchall())
         
-        # Also get all Immich photos indexed by (filename, filesize)
+        # Also get all Immich photos indexed by (filename, filesize).
+        # Filenames are lower-cased by Postgres so every asset row doesn't
+        # need a Python str.lower() call.
         cursor.execute("""
             SELECT 
-                a."originalFileName",
+                LOWER(a."originalFileName"),
                 e."fileSizeInByte",
                 a.id as asset_id
             FROM asset a
             LEFT JOIN asset_exif e ON a.id = e."assetId"
             WHERE a."deletedAt" IS NULL
+              AND a."originalFileName" IS NOT NULL
+              AND e."fileSizeInByte" IS NOT NULL
         """)
         immich_photos = {}
-        for row in cursor.fetchall():
-            filename, filesize, asset_id = row
-            if filename and filesize:
-                key = (filename.lower(), filesize)
-                immich_photos[key] = asset_id
+        for filename_lower, filesize, asset_id in cursor.fetchall():
+            if filename_lower and filesize:
+                immich_photos[(filename_lower, filesize)] = asset_id
         
         # Get face counts per asset
         cursor.execute("""
@@ -102,7 +104,6 @@ def find_missing_people() -> dict:
             FROM Person p
             JOIN Face f ON f.Face_PersonId = p.Person_Id
             WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
               AND TRIM(p.Person_Name) != ''
             GROUP BY p.Person_Id, p.Person_Name
             ORDER BY face_count DESC
@@ -126,35 +127,60 @@ def find_missing_people() -> dict:
         # Step 3: For each missing person, get sample photos and diagnose
         # ==========================================================================
         results = []
+        people_to_analyze = missing_people[:50]  # Limit to first 50 for performance
+        
+        # Fetch up to 20 photos for every analyzed person in a single query
+        photos_by_person = defaultdict(list)
+        if people_to_analyze:
+            person_ids = [p["person_id"] for p in people_to_analyze]
+            placeholders = ", ".join("?" for _ in person_ids)
+            cursor.execute(f"""
+                WITH ranked AS (
+                    SELECT 
+                        f.Face_PersonId,
+                        i.Item_FileName,
+                        i.Item_FileSize,
+                        fld.Folder_Path,
+                        f.Face_Rect_Top,
+                        f.Face_Rect_Left,
+                        f.Face_Rect_Width,
+                        f.Face_Rect_Height,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY f.Face_PersonId ORDER BY f.Face_Id
+                        ) AS rn
+                    FROM Face f
+                    JOIN Item i ON f.Face_ItemId = i.Item_Id
+                    LEFT JOIN Folder fld ON i.Item_ParentFolderId = fld.Folder_Id
+                    WHERE f.Face_PersonId IN ({placeholders})
+                )
+                SELECT 
+                    Face_PersonId,
+                    Item_FileName,
+                    Item_FileSize,
+                    Folder_Path,
+                    Face_Rect_Top,
+                    Face_Rect_Left,
+                    Face_Rect_Width,
+                    Face_Rect_Height
+                FROM ranked
+                WHERE rn <= 20
+                ORDER BY Face_PersonId, rn
+            """, person_ids)
+            
+            for row in cursor.fetchall():
+                photos_by_person[row[0]].append(tuple(row[1:]))
         
-        for person_info in missing_people[:50]:  # Limit to first 50 for performance
+        for person_info in people_to_analyze:
             person_id = person_info["person_id"]
             person_name = person_info["person_name"]
             
-            # Get all photos for this person
-            cursor.execute("""
-                SELECT 
-                    i.Item_FileName,
-                    i.Item_FileSize,
-                    fld.Folder_Path,
-                    f.Face_Rect_Top,
-                    f.Face_Rect_Left,
-                    f.Face_Rect_Width,
-                    f.Face_Rect_Height
-                FROM Face f
-                JOIN Item i ON f.Face_ItemId = i.Item_Id
-                LEFT JOIN Folder fld ON i.Item_ParentFolderId = fld.Folder_Id
-                WHERE f.Face_PersonId = ?
-                LIMIT 20
-            """, (person_id,))
-            
             photos_checked = 0
             photos_in_immich = 0
             photos_not_in_immich = 0
             photos_with_immich_faces = 0
             sample_photos = []
             
-            for photo_row in cursor.fetchall():
+            for photo_row in photos_by_person[person_id]:
                 filename, filesize, folder_path, top, left, width, height = photo_row
                 if not filename or not filesize:
                     continue
@@ -239,7 +265,7 @@ def get_detailed_face_comparison(ms_person_id: int, immich_asset_id: str) -> dic
     
     This helps diagnose why faces didn't match (IoU too low, etc.)
     """
-    from services.matching import ms_rect_to_normalized, immich_rect_to_normalized, calculate_iou, calculate_center_distance
+    from services.matching import ms_rect_to_normalized, immich_rect_to_normalized, pairwise_iou, pairwise_center_distance
     
     # Get MS Photos face rect
     with get_ms_photos_connection() as ms_conn:
@@ -316,19 +342,22 @@ def get_detailed_face_comparison(ms_person_id: int, immich_asset_id: str) -> dic
                     "rect_normalized": rect,
                 })
     
-    # Calculate IoU between all pairs
+    # Calculate IoU between all pairs in one vectorized pass
+    ms_rects = [f["rect_normalized"] for f in ms_faces]
+    imm_rects = [f["rect_normalized"] for f in immich_faces]
+    iou_matrix = pairwise_iou(ms_rects, imm_rects).tolist()
+    center_dist_matrix = pairwise_center_distance(ms_rects, imm_rects).tolist()
+    
     comparisons = []
-    for ms_face in ms_faces:
-        for imm_face in immich_faces:
-            iou = calculate_iou(ms_face["rect_normalized"], imm_face["rect_normalized"])
-            center_dist = calculate_center_distance(ms_face["rect_normalized"], imm_face["rect_normalized"])
+    for ms_idx, ms_face in enumerate(ms_faces):
+        for imm_idx, imm_face in enumerate(immich_faces):
             comparisons.append({
                 "ms_name": ms_face["name"],
                 "ms_rect": ms_face["rect_normalized"],
                 "immich_name": imm_face["person_name"],
                 "immich_rect": imm_face["rect_normalized"],
-                "iou": iou,
-                "center_dist": center_dist,
+                "iou": iou_matrix[ms_idx][imm_idx],
+                "center_dist": center_dist_matrix[ms_idx][imm_idx],
             })
     
     return {
@@ -5,23 +5,28 @@ for debugging and review.
 
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from itertools import repeat
+from typing import NamedTuple, Optional
 import sys
 import os
 
+import numpy as np
+from psycopg2.extras import execute_values
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_effective_ms_photos_db, get_effective_immich_db_config
 from database import get_ms_photos_connection, get_immich_connection
 # Import shared matching utilities - single source of truth
 from services.matching import (
-    calculate_iou, 
-    calculate_center_distance, 
     ms_rect_to_normalized,
-    immich_rect_to_normalized
+    immich_rect_to_normalized,
+    use_optimal_assignment,
 )
+from services.matching_kernel import match_photos
 
 
-@dataclass
-class PhotoFaceMatch:
+class PhotoFaceMatch(NamedTuple):
     """A single face match on a specific photo."""
     filename: str
     immich_asset_id: str
@@ -54,172 +59,436 @@ class PhotoFaceMatch:
     file_size: int  # File size in bytes
 
 
+# Per-photo column lists built while loading Immich faces
+IMMICH_FACE_FIELDS = ("asset_id", "original_path", "rect", "cluster_name", "image_width", "image_height")
+
+MATCH_COLUMNS = (
+    "filename", "immich_asset_id", "immich_original_path", "ms_item_path",
+    "ms_person_name", "ms_rect", "immich_cluster_name", "immich_rect",
+    "iou", "center_dist", "image_width", "image_height", "file_size",
+)
+
+
+@dataclass
+class MatchBatch:
+    """
+    All face matches between one MS Photos person and one Immich cluster,
+    stored column-wise.
+    
+    Row i of every column describes one match. PhotoFaceMatch objects are
+    only materialized on indexing/iteration; to_dicts() serializes straight
+    from the columns. Batches may be shared through the cache, so treat
+    them as read-only.
+    """
+    ms_person_id: int
+    immich_cluster_id: str
+    filenames: list[str]
+    immich_asset_ids: list[str]
+    immich_original_paths: list[str]
+    ms_item_paths: list[str]
+    ms_person_names: list[str]
+    immich_cluster_names: list[Optional[str]]
+    ms_rects: np.ndarray  # (N, 4) normalized (x1, y1, x2, y2)
+    immich_rects: np.ndarray  # (N, 4) normalized (x1, y1, x2, y2)
+    iou: np.ndarray  # (N,) float64
+    center_dist: np.ndarray  # (N,) float64
+    image_widths: np.ndarray  # (N,) int64
+    image_heights: np.ndarray  # (N,) int64
+    file_sizes: np.ndarray  # (N,) int64
+    
+    @classmethod
+    def from_columns(cls, ms_person_id: int, immich_cluster_id: str, columns: dict[str, list]) -> "MatchBatch":
+        """Build a batch from per-column Python lists (see MATCH_COLUMNS)."""
+        return cls(
+            ms_person_id=ms_person_id,
+            immich_cluster_id=immich_cluster_id,
+            filenames=columns["filename"],
+            immich_asset_ids=columns["immich_asset_id"],
+            immich_original_paths=columns["immich_original_path"],
+            ms_item_paths=columns["ms_item_path"],
+            ms_person_names=columns["ms_person_name"],
+            immich_cluster_names=columns["immich_cluster_name"],
+            ms_rects=np.array(columns["ms_rect"], dtype=np.float64).reshape(-1, 4),
+            immich_rects=np.array(columns["immich_rect"], dtype=np.float64).reshape(-1, 4),
+            iou=np.array(columns["iou"], dtype=np.float64),
+            center_dist=np.array(columns["center_dist"], dtype=np.float64),
+            image_widths=np.array(columns["image_width"], dtype=np.int64),
+            image_heights=np.array(columns["image_height"], dtype=np.int64),
+            file_sizes=np.array(columns["file_size"], dtype=np.int64),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.filenames)
+    
+    def _row_columns(self) -> zip:
+        """Zip of per-field columns in PhotoFaceMatch field order, one tuple per row."""
+        n = len(self)
+        return zip(
+            self.filenames,
+            self.immich_asset_ids,
+            self.immich_original_paths,
+            self.ms_item_paths,
+            repeat(self.ms_person_id, n),
+            self.ms_person_names,
+            *self.ms_rects.T.tolist(),
+            repeat(self.immich_cluster_id, n),
+            self.immich_cluster_names,
+            *self.immich_rects.T.tolist(),
+            self.iou.tolist(),
+            self.center_dist.tolist(),
+            self.image_widths.tolist(),
+            self.image_heights.tolist(),
+            self.file_sizes.tolist(),
+        )
+    
+    def __getitem__(self, i: int) -> PhotoFaceMatch:
+        return PhotoFaceMatch._make((
+            self.filenames[i],
+            self.immich_asset_ids[i],
+            self.immich_original_paths[i],
+            self.ms_item_paths[i],
+            self.ms_person_id,
+            self.ms_person_names[i],
+            *self.ms_rects[i].tolist(),
+            self.immich_cluster_id,
+            self.immich_cluster_names[i],
+            *self.immich_rects[i].tolist(),
+            float(self.iou[i]),
+            float(self.center_dist[i]),
+            int(self.image_widths[i]),
+            int(self.image_heights[i]),
+            int(self.file_sizes[i]),
+        ))
+    
+    def __iter__(self):
+        return map(PhotoFaceMatch._make, self._row_columns())
+    
+    def to_dicts(self) -> list[dict]:
+        """Serialize to the same dicts as PhotoFaceMatch._asdict(), one per row."""
+        fields = PhotoFaceMatch._fields
+        return [dict(zip(fields, row)) for row in self._row_columns()]
+
+
+# SQLite builds without a raised limit accept at most 999 bound parameters
+SQLITE_MAX_PARAMS = 999
+
+
+@dataclass(frozen=True)
+class _CacheToken:
+    """
+    Cheap fingerprint of the rows get_detailed_face_matches depends on.
+    
+    Changes whenever faces are added to / removed from either side, a face in
+    the Immich cluster or one of its photos is updated (including trashing or
+    restoring the photo), either person is renamed, or a different database
+    is configured.
+    The face counts also tell which side is smaller.
+    """
+    ms_photos_db: str
+    immich_db: tuple
+    ms_face_count: int
+    ms_person_name: Optional[str]
+    immich_face_count: int
+    immich_updated_at: str
+    immich_assets_updated_at: str
+    immich_person: tuple
+
+
+def _get_cache_token(ms_person_id: int, immich_cluster_id: str) -> _CacheToken:
+    with get_ms_photos_connection() as ms_conn:
+        ms_face_count, ms_person_name = ms_conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM Face WHERE Face_PersonId = ?),
+                (SELECT Person_Name FROM Person WHERE Person_Id = ?)
+        """, (ms_person_id, ms_person_id)).fetchone()
+    
+    with get_immich_connection() as immich_conn:
+        cursor = immich_conn.cursor()
+        # asset."updatedAt" also moves when a photo is trashed or restored, and
+        # renaming the person only touches its own row
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                MAX(af."updatedAt"),
+                MAX(a."updatedAt"),
+                (SELECT name FROM person WHERE id = %s),
+                (SELECT "updatedAt" FROM person WHERE id = %s)
+            FROM asset_face af
+            LEFT JOIN asset a ON af."assetId" = a.id
+            WHERE af."personId" = %s
+        """, (immich_cluster_id, immich_cluster_id, immich_cluster_id))
+        immich_face_count, immich_updated_at, immich_assets_updated_at, *immich_person = cursor.fetchone()
+    
+    db_config = get_effective_immich_db_config()
+    return _CacheToken(
+        ms_photos_db=get_effective_ms_photos_db(),
+        immich_db=(db_config["host"], db_config["port"], db_config["name"]),
+        ms_face_count=ms_face_count,
+        ms_person_name=ms_person_name,
+        immich_face_count=immich_face_count,
+        immich_updated_at=str(immich_updated_at),
+        immich_assets_updated_at=str(immich_assets_updated_at),
+        immich_person=tuple(str(value) for value in immich_person),
+    )
+
+
+def _get_cluster_file_sizes(immich_cluster_id: str) -> list[int]:
+    """Distinct file sizes of the photos in an Immich cluster."""
+    with get_immich_connection() as immich_conn:
+        cursor = immich_conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT e."fileSizeInByte"
+            FROM asset_face af
+            JOIN asset a ON af."assetId" = a.id
+            JOIN asset_exif e ON a.id = e."assetId"
+            WHERE af."personId" = %s
+              AND af."deletedAt" IS NULL
+              AND a."deletedAt" IS NULL
+              AND e."fileSizeInByte" IS NOT NULL
+        """, (immich_cluster_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+
 def get_detailed_face_matches(
     ms_person_id: int, 
     immich_cluster_id: str, 
     min_iou: float = 0.3,
     max_center_dist: float = 0.4
-) -> list[PhotoFaceMatch]:
+) -> MatchBatch:
     """
     Get all individual face matches between an MS Photos person and Immich cluster.
     
     Returns detailed information for each photo where faces match, including
-    rect coordinates for drawing overlays.
+    rect coordinates for drawing overlays, sorted by IoU descending. Results
+    are cached per input and reused until the underlying face rows change.
     """
+    cache_token = _get_cache_token(ms_person_id, immich_cluster_id)
+    return _compute_face_matches(ms_person_id, immich_cluster_id, min_iou, max_center_dist, cache_token)
+
+
+@lru_cache(maxsize=256)
+def _compute_face_matches(
+    ms_person_id: int, 
+    immich_cluster_id: str, 
+    min_iou: float,
+    max_center_dist: float,
+    cache_token: _CacheToken,
+) -> MatchBatch:
+    """Load both sides for one person/cluster pair and match their faces.
+    
+    cache_token takes part in the LRU cache key; its face counts decide which
+    side is loaded first to filter the other.
+    """
+    empty = MatchBatch.from_columns(ms_person_id, immich_cluster_id, {name: [] for name in MATCH_COLUMNS})
+    
+    # When the Immich cluster is the smaller side, only load MS faces on photos
+    # whose file size occurs in the cluster. (Otherwise the Immich query below
+    # is filtered by the MS faces.)
+    ms_size_chunks = [None]
+    if cache_token.immich_face_count < cache_token.ms_face_count:
+        file_sizes = _get_cluster_file_sizes(immich_cluster_id)
+        if not file_sizes:
+            return empty
+        step = SQLITE_MAX_PARAMS - 1
+        ms_size_chunks = [file_sizes[i:i + step] for i in range(0, len(file_sizes), step)]
+    
     # Load MS Photos faces for this person
     with get_ms_photos_connection() as ms_conn:
         ms_cursor = ms_conn.cursor()
         
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                i.Item_FileSize,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height,
-                p.Person_Name,
-                fld.Folder_Path
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            LEFT JOIN Folder fld ON i.Item_ParentFolderId = fld.Folder_Id
-            WHERE p.Person_Id = ?
-              AND f.Face_Rect_Top IS NOT NULL
-        """, (ms_person_id,))
+        # Build: (filename_lower, filesize) -> per-photo column lists
+        ms_faces_by_photo = defaultdict(lambda: {"rect": [], "person_name": [], "folder_path": []})
         
-        # Build: (filename_lower, filesize) -> list of (person_name, rect, folder_path)
-        ms_faces_by_photo = defaultdict(list)
-        
-        for row in ms_cursor.fetchall():
-            filename, filesize, top, left, width, height, person_name, folder_path = row
-            if not filename:
-                continue
-            # Use (filename, filesize) tuple as key for unique identification
-            key = (filename.lower(), filesize)
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append({
-                "person_name": person_name,
-                "rect": rect,
-                "folder_path": folder_path or "",
-            })
-    
-    # Load Immich faces for this cluster
+        for size_chunk in ms_size_chunks:
+            size_filter = ""
+            params = (ms_person_id,)
+            if size_chunk is not None:
+                size_filter = f"AND i.Item_FileSize IN ({','.join('?' * len(size_chunk))})"
+                params += tuple(size_chunk)
+            
+            ms_cursor.execute(f"""
+                SELECT 
+                    i.Item_FileName,
+                    i.Item_FileSize,
+                    f.Face_Rect_Top,
+                    f.Face_Rect_Left,
+                    f.Face_Rect_Width,
+                    f.Face_Rect_Height,
+                    p.Person_Name,
+                    fld.Folder_Path
+                FROM Face f
+                JOIN Item i ON f.Face_ItemId = i.Item_Id
+                JOIN Person p ON f.Face_PersonId = p.Person_Id
+                LEFT JOIN Folder fld ON i.Item_ParentFolderId = fld.Folder_Id
+                WHERE p.Person_Id = ?
+                  AND f.Face_Rect_Top IS NOT NULL
+                  {size_filter}
+            """, params)
+            
+            # Stream rows instead of materializing the whole result set
+            for row in ms_cursor:
+                filename, filesize, top, left, width, height, person_name, folder_path = row
+                if not filename:
+                    continue
+                # Use (filename, filesize) tuple as key for unique identification
+                key = (filename.lower(), filesize)
+                rect = ms_rect_to_normalized(top, left, width, height)
+                faces = ms_faces_by_photo[key]
+                faces["rect"].append(rect)
+                faces["person_name"].append(person_name)
+                faces["folder_path"].append(folder_path or "")
+    
+    if not ms_faces_by_photo:
+        return empty
+    
+    # Stage this person's MS faces in Postgres so the Immich query only returns
+    # faces on shared photos. With a positive IoU threshold, faces that don't
+    # intersect any MS face on their photo can never match, so the database
+    # drops them too with a cheap bbox-overlap test.
+    overlap_filter = """
+                  AND GREATEST(f.nx1, mf.x1) < LEAST(f.nx2, mf.x2)
+                  AND GREATEST(f.ny1, mf.y1) < LEAST(f.ny2, mf.y2)
+    """ if min_iou > 0 else ""
+    
     with get_immich_connection() as immich_conn:
         immich_cursor = immich_conn.cursor()
         
         immich_cursor.execute("""
+            CREATE TEMP TABLE ms_faces (
+                fn text, sz bigint,
+                x1 double precision, y1 double precision,
+                x2 double precision, y2 double precision
+            ) ON COMMIT DROP
+        """)
+        execute_values(
+            immich_cursor,
+            "INSERT INTO ms_faces (fn, sz, x1, y1, x2, y2) VALUES %s",
+            [
+                (key[0], key[1], *rect)
+                for key, faces in ms_faces_by_photo.items()
+                for rect in faces["rect"]
+            ],
+        )
+        
+        # Named (server-side) cursor streams the rows in batches of itersize
+        faces_cursor = immich_conn.cursor(name="detailed_faces_cur")
+        faces_cursor.itersize = 5000
+        faces_cursor.execute(f"""
+            WITH faces AS (
+                SELECT 
+                    LOWER(a."originalFileName") AS filename_lower,
+                    e."fileSizeInByte" AS filesize,
+                    a.id AS asset_id,
+                    a."originalPath" AS original_path,
+                    af."boundingBoxX1"::float / NULLIF(af."imageWidth", 0) AS nx1,
+                    af."boundingBoxY1"::float / NULLIF(af."imageHeight", 0) AS ny1,
+                    af."boundingBoxX2"::float / NULLIF(af."imageWidth", 0) AS nx2,
+                    af."boundingBoxY2"::float / NULLIF(af."imageHeight", 0) AS ny2,
+                    af."imageWidth" AS image_width,
+                    af."imageHeight" AS image_height,
+                    p.name AS cluster_name
+                FROM asset_face af
+                JOIN asset a ON af."assetId" = a.id
+                JOIN asset_exif e ON a.id = e."assetId"
+                LEFT JOIN person p ON af."personId" = p.id
+                WHERE af."personId" = %s
+                  AND af."deletedAt" IS NULL
+                  AND a."deletedAt" IS NULL
+                  AND af."boundingBoxX1" IS NOT NULL
+            )
             SELECT 
-                a."originalFileName",
-                e."fileSizeInByte",
-                a.id as asset_id,
-                a."originalPath",
-                af."boundingBoxX1",
-                af."boundingBoxY1",
-                af."boundingBoxX2",
-                af."boundingBoxY2",
-                af."imageWidth",
-                af."imageHeight",
-                p.name as cluster_name
-            FROM asset_face af
-            JOIN asset a ON af."assetId" = a.id
-            LEFT JOIN asset_exif e ON a.id = e."assetId"
-            LEFT JOIN person p ON af."personId" = p.id
-            WHERE af."personId" = %s
-              AND af."deletedAt" IS NULL
-              AND a."deletedAt" IS NULL
-              AND af."boundingBoxX1" IS NOT NULL
+                f.filename_lower, f.filesize, f.asset_id, f.original_path,
+                f.nx1, f.ny1, f.nx2, f.ny2,
+                f.image_width, f.image_height, f.cluster_name
+            FROM faces f
+            WHERE EXISTS (
+                SELECT 1 FROM ms_faces mf
+                WHERE mf.fn = f.filename_lower
+                  AND mf.sz = f.filesize
+                {overlap_filter}
+            )
         """, (immich_cluster_id,))
         
-        # Build: (filename_lower, filesize) -> list of face data
-        immich_faces_by_photo = defaultdict(list)
+        # Build: (filename_lower, filesize) -> per-photo column lists
+        immich_faces_by_photo = defaultdict(lambda: {name: [] for name in IMMICH_FACE_FIELDS})
         
-        for row in immich_cursor.fetchall():
-            (filename, filesize, asset_id, original_path, x1, y1, x2, y2, 
-             img_w, img_h, cluster_name) = row
-            if not filename or not img_w or not img_h or not filesize:
+        for row in faces_cursor:
+            filename_lower, filesize, asset_id, original_path = row[:4]
+            img_w, img_h, cluster_name = row[8:]
+            if not filename_lower or not img_w or not img_h or not filesize:
                 continue
             
-            # Use (filename, filesize) tuple as key for unique identification
-            key = (filename.lower(), filesize)
-            # Convert to normalized coords
-            rect = (x1 / img_w, y1 / img_h, x2 / img_w, y2 / img_h)
+            # Use (filename, filesize) tuple as key for unique identification;
+            # the query already lower-cased the filename
+            key = (filename_lower, filesize)
+            # Normalized (x1, y1, x2, y2), computed by the query
+            rect = row[4:8]
             
-            immich_faces_by_photo[key].append({
-                "asset_id": str(asset_id),
-                "original_path": original_path or "",
-                "rect": rect,
-                "cluster_name": cluster_name,
-                "image_width": img_w,
-                "image_height": img_h,
-                "file_size": filesize,
-            })
+            faces = immich_faces_by_photo[key]
+            faces["asset_id"].append(str(asset_id))
+            faces["original_path"].append(original_path or "")
+            faces["rect"].append(rect)
+            faces["cluster_name"].append(cluster_name)
+            faces["image_width"].append(img_w)
+            faces["image_height"].append(img_h)
     
     # Find common photos and match faces using GREEDY matching
     # This ensures consistency with the main matching algorithm
-    common_photos = set(ms_faces_by_photo.keys()) & set(immich_faces_by_photo.keys())
+    # Walk the smaller dict and probe the larger one instead of building sets
+    if len(ms_faces_by_photo) <= len(immich_faces_by_photo):
+        small, large = ms_faces_by_photo, immich_faces_by_photo
+    else:
+        small, large = immich_faces_by_photo, ms_faces_by_photo
+    common_photos = [key for key in small if key in large]
+    
+    # Lay out every photo's faces as flat rect arrays plus per-photo offsets
+    # so all photos are matched in a single kernel call
+    ms_counts = [len(ms_faces_by_photo[key]["rect"]) for key in common_photos]
+    imm_counts = [len(immich_faces_by_photo[key]["rect"]) for key in common_photos]
+    ms_offsets = np.concatenate(([0], np.cumsum(ms_counts, dtype=np.int64)))
+    imm_offsets = np.concatenate(([0], np.cumsum(imm_counts, dtype=np.int64)))
+    ms_rects = np.array(
+        [rect for key in common_photos for rect in ms_faces_by_photo[key]["rect"]], dtype=np.float64
+    )
+    imm_rects = np.array(
+        [rect for key in common_photos for rect in immich_faces_by_photo[key]["rect"]], dtype=np.float64
+    )
     
-    matches = []
-    for photo_key in common_photos:
-        filename, filesize = photo_key  # Unpack the (filename, filesize) tuple
+    # Greedy matching per photo: best IoU first, each face used at most once
+    # (or the optimal assignment, if enabled in settings)
+    optimal = use_optimal_assignment()
+    photo_idx, ms_idx, imm_idx, ious, center_dists = match_photos(
+        ms_rects, ms_offsets, imm_rects, imm_offsets, min_iou, max_center_dist, optimal=optimal
+    )
+    
+    # Best matches first; stable so ties keep photo / acceptance order
+    order = np.argsort(-ious, kind="stable")
+    
+    columns = {name: [] for name in MATCH_COLUMNS}
+    for p, ms_i, imm_i, iou, center_dist in zip(
+        photo_idx[order].tolist(),
+        ms_idx[order].tolist(),
+        imm_idx[order].tolist(),
+        ious[order].tolist(),
+        center_dists[order].tolist(),
+    ):
+        photo_key = common_photos[p]
+        filename, filesize = photo_key
         ms_faces = ms_faces_by_photo[photo_key]
-        immich_faces = immich_faces_by_photo[photo_key]
-        
-        # Greedy matching: collect all potential matches, sort by IoU, pick best non-conflicting
-        potential_matches = []
-        for ms_idx, ms_face in enumerate(ms_faces):
-            for imm_idx, imm_face in enumerate(immich_faces):
-                iou = calculate_iou(ms_face["rect"], imm_face["rect"])
-                center_dist = calculate_center_distance(ms_face["rect"], imm_face["rect"])
-                # Both criteria must be satisfied (AND logic)
-                if iou >= min_iou and center_dist <= max_center_dist:
-                    potential_matches.append((iou, center_dist, ms_idx, imm_idx, ms_face, imm_face))
-        
-        # Sort by IoU descending (best matches first)
-        potential_matches.sort(key=lambda x: x[0], reverse=True)
-        
-        # Greedily select matches, ensuring each face is used at most once
-        used_ms_faces = set()
-        used_imm_faces = set()
+        imm_faces = immich_faces_by_photo[photo_key]
         
-        for iou, center_dist, ms_idx, imm_idx, ms_face, imm_face in potential_matches:
-            if ms_idx in used_ms_faces or imm_idx in used_imm_faces:
-                continue  # This face already matched with a better candidate
-            
-            used_ms_faces.add(ms_idx)
-            used_imm_faces.add(imm_idx)
-            
-            ms_rect = ms_face["rect"]
-            imm_rect = imm_face["rect"]
-            
-            matches.append(PhotoFaceMatch(
-                filename=filename,
-                immich_asset_id=imm_face["asset_id"],
-                immich_original_path=imm_face["original_path"],
-                ms_item_path=ms_face["folder_path"],
-                
-                ms_person_id=ms_person_id,
-                ms_person_name=ms_face["person_name"],
-                ms_rect_x1=ms_rect[0],
-                ms_rect_y1=ms_rect[1],
-                ms_rect_x2=ms_rect[2],
-                ms_rect_y2=ms_rect[3],
-                
-                immich_cluster_id=immich_cluster_id,
-                immich_cluster_name=imm_face["cluster_name"],
-                immich_rect_x1=imm_rect[0],
-                immich_rect_y1=imm_rect[1],
-                immich_rect_x2=imm_rect[2],
-                immich_rect_y2=imm_rect[3],
-                
-                iou=iou,
-                center_dist=center_dist,
-                image_width=imm_face["image_width"],
-                image_height=imm_face["image_height"],
-                file_size=imm_face["file_size"],
-            ))
-    
-    # Sort by IoU descending (best matches first)
-    matches.sort(key=lambda m: m.iou, reverse=True)
-    
-    return matches
+        columns["filename"].append(filename)
+        columns["immich_asset_id"].append(imm_faces["asset_id"][imm_i])
+        columns["immich_original_path"].append(imm_faces["original_path"][imm_i])
+        columns["ms_item_path"].append(ms_faces["folder_path"][ms_i])
+        columns["ms_person_name"].append(ms_faces["person_name"][ms_i])
+        columns["ms_rect"].append(ms_faces["rect"][ms_i])
+        columns["immich_cluster_name"].append(imm_faces["cluster_name"][imm_i])
+        columns["immich_rect"].append(imm_faces["rect"][imm_i])
+        columns["iou"].append(iou)
+        columns["center_dist"].append(center_dist)
+        columns["image_width"].append(imm_faces["image_width"][imm_i])
+        columns["image_height"].append(imm_faces["image_height"][imm_i])
+        columns["file_size"].append(filesize)
+    
+    return MatchBatch.from_columns(ms_person_id, immich_cluster_id, columns)
@@ -9,15 +9,42 @@ Algorithm (from match_v3.py):
 This is foolproof: same filename + same face position = same person.
 """
 
+from array import array
 from collections import defaultdict
 from dataclasses import dataclass, asdict
+from contextlib import closing
+from functools import lru_cache
 from typing import Optional
+import math
 import sys
 import os
 
+import numpy as np
+from psycopg2.extras import execute_values
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_settings, get_effective_ms_photos_db_path, get_effective_immich_db_config
 from database import get_ms_photos_connection, get_immich_connection
 
+# Compiled greedy selection, only present if built with setup_kernels.py
+try:
+    from services._match_kernel import greedy_select as _greedy_select_c
+    HAS_CYTHON_KERNEL = True
+except ImportError:
+    HAS_CYTHON_KERNEL = False
+
 
 @dataclass
 class PersonMatch:
@@ -33,31 +60,88 @@ class PersonMatch:
     sample_photos: list[str]
 
 
+def _iou_scalar(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    """IoU of two (x1, y1, x2, y2) rects passed as 8 scalars; numba-compatible."""
+    ix1 = max(ax1, bx1)
+    iy1 = max(ay1, by1)
+    ix2 = min(ax2, bx2)
+    iy2 = min(ay2, by2)
+    
+    if ix2 <= ix1 or iy2 <= iy1:
+        return 0.0
+    
+    intersection = (ix2 - ix1) * (iy2 - iy1)
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - intersection
+    
+    return intersection / union if union > 0 else 0.0
+
+
+def _center_dist_scalar(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    """Normalized center distance of two rects passed as 8 scalars; numba-compatible."""
+    dx = (ax1 + ax2) / 2 - (bx1 + bx2) / 2
+    dy = (ay1 + ay2) / 2 - (by1 + by2) / 2
+    dist = math.sqrt(dx * dx + dy * dy)
+    
+    ux = max(ax2, bx2) - min(ax1, bx1)
+    uy = max(ay2, by2) - min(ay1, by1)
+    union_diag = math.sqrt(ux * ux + uy * uy)
+    
+    return dist / union_diag if union_diag > 0 else 1.0
+
+
+# Native versions, used by calculate_iou / calculate_center_distance and inside
+# JIT-compiled loops (plain Python without numba). fastmath is left off so
+# results are bit-identical with and without numba.
+if HAS_NUMBA:
+    _iou_scalar_nb = njit(cache=True)(_iou_scalar)
+    _center_dist_scalar_nb = njit(cache=True)(_center_dist_scalar)
+else:
+    _iou_scalar_nb = _iou_scalar
+    _center_dist_scalar_nb = _center_dist_scalar
+
+
 def calculate_iou(rect1: tuple, rect2: tuple) -> float:
     """
     Calculate Intersection over Union (IoU) between two rectangles.
     Both rects should be in (x1, y1, x2, y2) normalized format.
+    
+    Thin wrapper that unpacks the tuples into the (JIT-compiled, if numba is
+    installed) scalar kernel _iou_scalar.
     """
-    x1_1, y1_1, x2_1, y2_1 = rect1
-    x1_2, y1_2, x2_2, y2_2 = rect2
+    return _iou_scalar_nb(*rect1, *rect2)
+
+
+def calculate_iou_with_areas(rect1: tuple, rect2: tuple, area1: float, area2: float) -> float:
+    """
+    Calculate IoU like calculate_iou, using precomputed rectangle areas.
     
-    # Calculate intersection
-    x1_i = max(x1_1, x1_2)
-    y1_i = max(y1_1, y1_2)
-    x2_i = min(x2_1, x2_2)
-    y2_i = min(y2_1, y2_2)
+    Use this in hot loops where the same rect is compared many times and its
+    area can be computed once up front.
+    """
+    x1_i = max(rect1[0], rect2[0])
+    y1_i = max(rect1[1], rect2[1])
+    x2_i = min(rect1[2], rect2[2])
+    y2_i = min(rect1[3], rect2[3])
     
     if x2_i <= x1_i or y2_i <= y1_i:
         return 0.0
     
     intersection = (x2_i - x1_i) * (y2_i - y1_i)
-    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
     union = area1 + area2 - intersection
     
     return intersection / union if union > 0 else 0.0
 
 
+def rect_area(rect: tuple) -> float:
+    """Area of a normalized (x1, y1, x2, y2) rect."""
+    return (rect[2] - rect[0]) * (rect[3] - rect[1])
+
+
+def rect_areas(rects: np.ndarray) -> np.ndarray:
+    """Vectorized rect_area over a (..., N, 4) array; returns (..., N)."""
+    return (rects[..., 2] - rects[..., 0]) * (rects[..., 3] - rects[..., 1])
+
+
 def calculate_center_distance(rect1: tuple, rect2: tuple) -> float:
     """
     Calculate normalized distance between rectangle centers.
@@ -65,28 +149,167 @@ def calculate_center_distance(rect1: tuple, rect2: tuple) -> float:
     Returns a value between 0 (same center) and ~1.4 (opposite corners).
     A value <= 0.3 means centers are quite close (concentric).
     
-    Both rects should be in (x1, y1, x2, y2) normalized format.
+    Both rects should be in (x1, y1, x2, y2) normalized format. Thin wrapper
+    around the scalar kernel _center_dist_scalar.
     """
-    x1_1, y1_1, x2_1, y2_1 = rect1
-    x1_2, y1_2, x2_2, y2_2 = rect2
+    return _center_dist_scalar_nb(*rect1, *rect2)
+
+
+def _as_rect_array(rects) -> np.ndarray:
+    """Convert rects to a float64 array of shape (..., N, 4); empty input becomes (0, 4)."""
+    arr = np.asarray(rects, dtype=np.float64)
+    return arr.reshape(-1, 4) if arr.ndim < 2 else arr
+
+
+def pairwise_iou(rects1, rects2, areas1=None, areas2=None) -> np.ndarray:
+    """
+    Calculate IoU between every pair of rectangles in two sets.
+    
+    Vectorized equivalent of calculate_iou: rects1 is (N, 4) and rects2 is
+    (M, 4), both in (x1, y1, x2, y2) normalized format. Returns an (N, M) matrix.
+    Leading batch dimensions are broadcast, e.g. (P, N, 4) x (P, M, 4) -> (P, N, M).
+    areas1 / areas2 can pass the rect areas if they are already known.
+    """
+    a = _as_rect_array(rects1)
+    b = _as_rect_array(rects2)
     
-    # Calculate centers
-    cx1 = (x1_1 + x2_1) / 2
-    cy1 = (y1_1 + y2_1) / 2
-    cx2 = (x1_2 + x2_2) / 2
-    cy2 = (y1_2 + y2_2) / 2
+    # Intersection of every pair via broadcasting (N, 1, 2) against (1, M, 2)
+    top_left = np.maximum(a[..., :, None, :2], b[..., None, :, :2])
+    bottom_right = np.minimum(a[..., :, None, 2:], b[..., None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
     
-    # Euclidean distance between centers
-    dist = ((cx1 - cx2) ** 2 + (cy1 - cy2) ** 2) ** 0.5
+    area_a = rect_areas(a) if areas1 is None else areas1
+    area_b = rect_areas(b) if areas2 is None else areas2
+    union = area_a[..., :, None] + area_b[..., None, :] - intersection
+    
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=(intersection > 0) & (union > 0))
+    return iou
+
+
+def pairwise_center_distance(rects1, rects2) -> np.ndarray:
+    """
+    Calculate normalized center distance between every pair of rectangles.
+    
+    Vectorized equivalent of calculate_center_distance for (N, 4) and (M, 4)
+    inputs. Returns an (N, M) matrix; leading batch dimensions are broadcast
+    like in pairwise_iou.
+    """
+    a = _as_rect_array(rects1)
+    b = _as_rect_array(rects2)
+    
+    center_a = (a[..., :2] + a[..., 2:]) / 2
+    center_b = (b[..., :2] + b[..., 2:]) / 2
+    dist = np.linalg.norm(center_a[..., :, None, :] - center_b[..., None, :, :], axis=-1)
     
     # Normalize by diagonal of union bounding box
-    union_x1 = min(x1_1, x1_2)
-    union_y1 = min(y1_1, y1_2)
-    union_x2 = max(x2_1, x2_2)
-    union_y2 = max(y2_1, y2_2)
-    union_diag = ((union_x2 - union_x1) ** 2 + (union_y2 - union_y1) ** 2) ** 0.5
+    union_min = np.minimum(a[..., :, None, :2], b[..., None, :, :2])
+    union_max = np.maximum(a[..., :, None, 2:], b[..., None, :, 2:])
+    union_diag = np.linalg.norm(union_max - union_min, axis=-1)
     
-    return dist / union_diag if union_diag > 0 else 1.0
+    center_dist = np.ones_like(dist)
+    np.divide(dist, union_diag, out=center_dist, where=union_diag > 0)
+    return center_dist
+
+
+def paired_center_distance(rects1, rects2) -> np.ndarray:
+    """
+    Calculate normalized center distance between rects1[k] and rects2[k].
+    
+    Element-wise counterpart of pairwise_center_distance for two (K, 4)
+    inputs, used to evaluate only the pairs that survived the IoU test.
+    Returns a (K,) array.
+    """
+    a = _as_rect_array(rects1)
+    b = _as_rect_array(rects2)
+    
+    center_a = (a[:, :2] + a[:, 2:]) / 2
+    center_b = (b[:, :2] + b[:, 2:]) / 2
+    dist = np.linalg.norm(center_a - center_b, axis=-1)
+    
+    union_diag = np.linalg.norm(np.maximum(a[:, 2:], b[:, 2:]) - np.minimum(a[:, :2], b[:, :2]), axis=-1)
+    
+    center_dist = np.ones_like(dist)
+    np.divide(dist, union_diag, out=center_dist, where=union_diag > 0)
+    return center_dist
+
+
+def greedy_match(
+    iou_matrix: np.ndarray,
+    center_dist_matrix: np.ndarray,
+    min_iou: float,
+    max_center_dist: float,
+) -> list[tuple[int, int]]:
+    """
+    Greedy 1-to-1 assignment of faces on one photo from precomputed metric matrices.
+    
+    Pairs passing both thresholds are taken in descending IoU order (ties keep
+    row-major order), skipping any face that was already matched.
+    
+    Returns:
+        (row, col) index pairs in the order they were accepted
+    """
+    if HAS_CYTHON_KERNEL:
+        return _greedy_select_c(
+            np.ascontiguousarray(iou_matrix, dtype=np.float64),
+            np.ascontiguousarray(center_dist_matrix, dtype=np.float64),
+            float(min_iou),
+            float(max_center_dist),
+        )
+    
+    # Both criteria must be satisfied (AND logic)
+    rows, cols = np.nonzero((iou_matrix >= min_iou) & (center_dist_matrix <= max_center_dist))
+    if rows.size == 0:
+        return []
+    
+    # Stable argsort on negated IoU keeps equal scores in row-major order
+    order = np.argsort(-iou_matrix[rows, cols], kind="stable")
+    
+    used_rows = [False] * iou_matrix.shape[0]
+    used_cols = [False] * iou_matrix.shape[1]
+    pairs = []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if used_rows[row] or used_cols[col]:
+            continue  # This face already matched with a better candidate
+        used_rows[row] = used_cols[col] = True
+        pairs.append((row, col))
+    
+    return pairs
+
+
+def optimal_match(
+    iou_matrix: np.ndarray,
+    center_dist_matrix: np.ndarray,
+    min_iou: float,
+    max_center_dist: float,
+) -> list[tuple[int, int]]:
+    """
+    Optimal 1-to-1 assignment of faces on one photo (Hungarian algorithm).
+    
+    Maximizes the total IoU over pairs passing both thresholds instead of
+    taking the best pair first like greedy_match. Requires scipy.
+    
+    Returns:
+        (row, col) index pairs in descending IoU order
+    """
+    eligible = (iou_matrix >= min_iou) & (center_dist_matrix <= max_center_dist)
+    if not eligible.any():
+        return []
+    
+    # Ineligible pairs add nothing to the total and are dropped afterwards
+    scores = np.where(eligible, iou_matrix, 0.0)
+    rows, cols = linear_sum_assignment(scores, maximize=True)
+    keep = eligible[rows, cols]
+    rows, cols = rows[keep], cols[keep]
+    
+    order = np.argsort(-iou_matrix[rows, cols], kind="stable")
+    return list(zip(rows[order].tolist(), cols[order].tolist()))
+
+
+def use_optimal_assignment() -> bool:
+    """Whether faces should be paired with optimal_match instead of greedy_match."""
+    return get_settings().optimal_face_assignment and HAS_SCIPY
 
 
 def ms_rect_to_normalized(top_val, left, width, height) -> tuple:
@@ -105,26 +328,105 @@ def immich_rect_to_normalized(x1, y1, x2, y2, img_w, img_h) -> Optional[tuple]:
     return (x1 / img_w, y1 / img_h, x2 / img_w, y2 / img_h)
 
 
-def find_matches(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dict:
+def ms_rects_to_normalized(top_val, left, width, height) -> np.ndarray:
+    """Vectorized ms_rect_to_normalized over equal-length columns; returns (N, 4)."""
+    top_val, left, width, height = (np.asarray(col, dtype=np.float64) for col in (top_val, left, width, height))
+    return np.column_stack((left, top_val - height, left + width, top_val))
+
+
+def immich_rects_to_normalized(x1, y1, x2, y2, img_w, img_h) -> np.ndarray:
     """
-    Find matches between MS Photos people and Immich clusters.
+    Vectorized immich_rect_to_normalized over equal-length columns; returns (N, 4).
     
-    Uses filename + filesize to identify common photos, then matches faces by 
-    position (IoU overlap AND center distance) on those photos.
+    Rows with a zero image width or height come out as NaN instead of None.
+    """
+    x1, y1, x2, y2, img_w, img_h = (np.asarray(col, dtype=np.float64) for col in (x1, y1, x2, y2, img_w, img_h))
+    valid = (img_w != 0) & (img_h != 0)
+    rects = np.full((len(x1), 4), np.nan)
+    np.divide(np.column_stack((x1, y1, x2, y2)), np.column_stack((img_w, img_h, img_w, img_h)),
+              out=rects, where=valid[:, None])
+    return rects
+
+
+def _split_rects_by_photo(faces_by_photo: list, face_photo_ids: np.ndarray, rects: np.ndarray) -> None:
+    """
+    Store each photo's rows of rects as its (N, 4) "rect" column, in place,
+    along with their (N,) "area" column.
     
-    Args:
-        min_iou: Minimum IoU to consider faces as matching (0.3 = 30% overlap)
-        max_center_dist: Maximum normalized center distance (0.4 = centers within 40% of diagonal)
+    face_photo_ids[k] is the photo id of rects[k]; faces keep their load order
+    within a photo. Photos without faces (None slots) are skipped.
+    """
+    order = np.argsort(face_photo_ids, kind="stable")
+    splits = np.cumsum(np.bincount(face_photo_ids, minlength=len(faces_by_photo)))[:-1]
+    rects = rects[order]
+    photo_rects = np.split(rects, splits)
+    photo_areas = np.split(rect_areas(rects), splits)
+    for faces, rect_column, area_column in zip(faces_by_photo, photo_rects, photo_areas):
+        if faces is not None:
+            faces["rect"] = rect_column
+            faces["area"] = area_column
+
+
+# Immich faces that the loaders below can turn into a normalized rect on a
+# (filename, filesize)-identified photo
+IMMICH_USABLE_FACES_SQL = """
+    FROM asset_face af
+    JOIN asset a ON af."assetId" = a.id
+    LEFT JOIN asset_exif e ON a.id = e."assetId"
+    LEFT JOIN person p ON af."personId" = p.id
+    WHERE af."personId" IS NOT NULL
+      AND af."deletedAt" IS NULL
+      AND a."deletedAt" IS NULL
+      AND af."boundingBoxX1" IS NOT NULL
+      AND a."originalFileName" <> ''
+      AND e."fileSizeInByte" <> 0
+      AND af."imageWidth" <> 0
+      AND af."imageHeight" <> 0
+"""
+
+
+def _stage_ms_file_sizes(immich_conn, photo_keys) -> None:
+    """
+    Stage the file sizes of the MS Photos photos in a temp table (ms_file_sizes).
     
-    Returns:
-        Dictionary with all_matches, applicable, and stats
+    Immich face queries semi-join against it so faces on photos that can't be
+    in MS Photos never leave the database. The table is dropped on commit.
     """
-    # ==========================================================================
-    # Step 1: Load MS Photos faces with positions
-    # ==========================================================================
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
+    cursor = immich_conn.cursor()
+    cursor.execute("CREATE TEMP TABLE ms_file_sizes (sz bigint PRIMARY KEY) ON COMMIT DROP")
+    file_sizes = {key[1] for key in photo_keys if key[1] is not None}
+    execute_values(cursor, "INSERT INTO ms_file_sizes (sz) VALUES %s", [(sz,) for sz in file_sizes])
+
+
+def _load_immich_cluster_summary(immich_conn) -> tuple[dict, int]:
+    """
+    Names of all Immich clusters with usable faces, and the number of photos
+    those faces are on.
+    
+    Computed in the database so the face rows themselves can be restricted to
+    photos shared with MS Photos without changing the reported stats.
+    """
+    cursor = immich_conn.cursor()
+    cursor.execute(f'SELECT DISTINCT af."personId", p.name {IMMICH_USABLE_FACES_SQL}')
+    immich_clusters = {str(cluster_id): cluster_name for cluster_id, cluster_name in cursor.fetchall()}
+    
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT DISTINCT LOWER(a."originalFileName"), e."fileSizeInByte"
+            {IMMICH_USABLE_FACES_SQL}
+        ) photos
+    """)
+    return immich_clusters, cursor.fetchone()[0]
+
+
+def iter_named_ms_faces():
+    """
+    Stream every named MS Photos face with its photo and raw rect.
+    
+    Yields (filename, filesize, person_id, person_name, top, left, width, height)
+    rows straight from the cursor; rects are not normalized yet.
+    """
+    with get_ms_photos_connection() as ms_conn, closing(ms_conn.cursor()) as ms_cursor:
         ms_cursor.execute("""
             SELECT 
                 i.Item_FileName,
@@ -139,32 +441,22 @@ def find_matches(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dict:
             JOIN Item i ON f.Face_ItemId = i.Item_Id
             JOIN Person p ON f.Face_PersonId = p.Person_Id
             WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
               AND TRIM(p.Person_Name) != ''
               AND f.Face_Rect_Top IS NOT NULL
         """)
-        
-        # Index by (filename_lowercase, filesize) for unique photo identification
-        ms_faces_by_photo = defaultdict(list)
-        ms_people = {}
-        
-        for row in ms_cursor.fetchall():
-            filename, filesize, person_id, person_name, top, left, width, height = row
-            if not filename:
-                continue
-            
-            # Use (filename, filesize) tuple as key for unique identification
-            key = (filename.lower(), filesize)
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append((person_id, person_name, rect))
-            ms_people[person_id] = person_name
+        yield from ms_cursor
+
+
+def _iter_immich_faces(immich_conn):
+    """
+    Stream the clustered Immich faces on photos staged in ms_file_sizes.
     
-    # ==========================================================================
-    # Step 2: Load Immich faces with positions
-    # ==========================================================================
-    with get_immich_connection() as immich_conn:
-        immich_cursor = immich_conn.cursor()
-        
+    Yields (filename, filesize, cluster_id, cluster_name, x1, y1, x2, y2,
+    image_width, image_height) rows from a named (server-side) cursor.
+    """
+    with closing(immich_conn.cursor(name="all_faces_cur")) as immich_cursor:
+        # Streams the rows in batches of itersize
+        immich_cursor.itersize = 5000
         immich_cursor.execute("""
             SELECT 
                 a."originalFileName",
@@ -185,79 +477,281 @@ def find_matches(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dict:
               AND af."deletedAt" IS NULL
               AND a."deletedAt" IS NULL
               AND af."boundingBoxX1" IS NOT NULL
+              AND e."fileSizeInByte" IN (SELECT sz FROM ms_file_sizes)
         """)
+        yield from immich_cursor
+
+
+@dataclass
+class LoadedFaces:
+    """
+    Faces of both databases indexed by integer photo id, plus names by id.
+    
+    Photo ids are assigned in MS Photos load order; photo_keys[photo_id] is
+    the (filename_lower, filesize) that identifies the photo in both databases.
+    """
+    photo_keys: list  # photo id -> (filename_lower, filesize)
+    ms_faces_by_photo: list  # photo id -> {"id": [...], "name": [...], "rect": (N, 4), "area": (N,)}
+    ms_people: dict  # Person_Id -> Person_Name
+    immich_faces_by_photo: list  # photo id -> same columns, or None if Immich has no faces there
+    immich_clusters: dict  # cluster id -> cluster name (all clusters, not just loaded faces)
+    immich_photo_count: int  # Immich photos with usable faces
+    
+    @property
+    def common_photos(self) -> list[int]:
+        """Ids of the photos with faces in both databases, in photo id order."""
+        has_immich = np.fromiter(
+            (faces is not None for faces in self.immich_faces_by_photo), dtype=bool,
+            count=len(self.immich_faces_by_photo),
+        )
+        return np.flatnonzero(has_immich).tolist()
+
+
+def _load_all_faces() -> LoadedFaces:
+    """
+    Load the named MS Photos faces and the clustered Immich faces on shared photos.
+    
+    Shared by find_matches and get_match_analytics so run_full_analysis only
+    reads both databases once.
+    """
+    # ==========================================================================
+    # Step 1: Load MS Photos faces with positions
+    # ==========================================================================
+    # Each unique (filename_lowercase, filesize) gets an integer photo id once;
+    # per-photo face columns live in a list indexed by that id
+    photo_ids = {}
+    photo_keys = []
+    ms_faces_by_photo = []
+    ms_people = {}
+    
+    # Raw rect values and the photo id of every face, normalized in one batch below
+    ms_face_photo_ids = array("q")
+    ms_raw_rects = array("d")
+    
+    for filename, filesize, person_id, person_name, top, left, width, height in iter_named_ms_faces():
+        if not filename:
+            continue
         
-        immich_faces_by_photo = defaultdict(list)
-        immich_clusters = {}
+        # Use (filename, filesize) tuple as key for unique identification
+        key = (filename.lower(), filesize)
+        photo_id = photo_ids.get(key)
+        if photo_id is None:
+            photo_id = photo_ids[key] = len(photo_keys)
+            photo_keys.append(key)
+            ms_faces_by_photo.append({"id": [], "name": []})
+        faces = ms_faces_by_photo[photo_id]
+        faces["id"].append(person_id)
+        faces["name"].append(person_name)
+        ms_face_photo_ids.append(photo_id)
+        ms_raw_rects.extend((top, left, width, height))
+        ms_people[person_id] = person_name
+    
+    raw = np.frombuffer(ms_raw_rects, dtype=np.float64).reshape(-1, 4)
+    _split_rects_by_photo(
+        ms_faces_by_photo,
+        np.frombuffer(ms_face_photo_ids, dtype=np.int64),
+        ms_rects_to_normalized(raw[:, 0], raw[:, 1], raw[:, 2], raw[:, 3]),
+    )
+    
+    # ==========================================================================
+    # Step 2: Load Immich faces with positions
+    # ==========================================================================
+    with get_immich_connection() as immich_conn:
+        immich_clusters, immich_photo_count = _load_immich_cluster_summary(immich_conn)
+        # Only faces on photos whose file size also occurs in MS Photos
+        _stage_ms_file_sizes(immich_conn, photo_keys)
         
-        for row in immich_cursor.fetchall():
+        immich_faces_by_photo = [None] * len(photo_keys)
+        immich_face_photo_ids = array("q")
+        immich_raw_rects = array("d")
+        
+        for row in _iter_immich_faces(immich_conn):
             filename, filesize, cluster_id, cluster_name, x1, y1, x2, y2, img_w, img_h = row
             if not filename or not filesize:
                 continue
             
-            # Use (filename, filesize) tuple as key for unique identification
-            key = (filename.lower(), filesize)
-            rect = immich_rect_to_normalized(x1, y1, x2, y2, img_w, img_h)
-            if not rect:
+            # Faces on photos without MS Photos faces can never match
+            photo_id = photo_ids.get((filename.lower(), filesize))
+            if photo_id is None:
+                continue
+            # No image size, no normalized rect
+            if not img_w or not img_h:
                 continue
             
-            cluster_id_str = str(cluster_id)
-            immich_faces_by_photo[key].append((cluster_id_str, cluster_name, rect))
-            immich_clusters[cluster_id_str] = cluster_name
+            faces = immich_faces_by_photo[photo_id]
+            if faces is None:
+                faces = immich_faces_by_photo[photo_id] = {"id": [], "name": []}
+            faces["id"].append(str(cluster_id))
+            faces["name"].append(cluster_name)
+            immich_face_photo_ids.append(photo_id)
+            immich_raw_rects.extend((x1, y1, x2, y2, img_w, img_h))
+    
+    raw = np.frombuffer(immich_raw_rects, dtype=np.float64).reshape(-1, 6)
+    _split_rects_by_photo(
+        immich_faces_by_photo,
+        np.frombuffer(immich_face_photo_ids, dtype=np.int64),
+        immich_rects_to_normalized(*raw.T),
+    )
+    
+    return LoadedFaces(
+        photo_keys=photo_keys,
+        ms_faces_by_photo=ms_faces_by_photo,
+        ms_people=ms_people,
+        immich_faces_by_photo=immich_faces_by_photo,
+        immich_clusters=immich_clusters,
+        immich_photo_count=immich_photo_count,
+    )
+
+
+@dataclass(frozen=True)
+class _MatchDataToken:
+    """
+    Cheap fingerprint of everything find_matches reads.
+    
+    Changes when a different database is configured, the MS Photos database
+    file (or its WAL) is written, Immich faces / assets / people are added,
+    removed or updated, or the face assignment setting is switched.
+    """
+    ms_photos_db: str
+    ms_photos_mtime_ns: tuple
+    immich_db: tuple
+    immich_state: tuple
+    optimal_assignment: bool
+
+
+def _get_match_data_token() -> _MatchDataToken:
+    ms_path = get_effective_ms_photos_db_path()
+    ms_mtimes = tuple(
+        os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        for path in (ms_path, f"{ms_path}-wal")
+    )
+    
+    with get_immich_connection() as immich_conn:
+        cursor = immich_conn.cursor()
+        cursor.execute("""
+            SELECT 
+                (SELECT COUNT(*) FROM asset_face),
+                (SELECT MAX("updatedAt") FROM asset_face),
+                (SELECT MAX("updatedAt") FROM asset),
+                (SELECT MAX("updatedAt") FROM person)
+        """)
+        immich_state = tuple(str(value) for value in cursor.fetchone())
+    
+    db_config = get_effective_immich_db_config()
+    return _MatchDataToken(
+        ms_photos_db=str(ms_path),
+        ms_photos_mtime_ns=ms_mtimes,
+        immich_db=(db_config["host"], db_config["port"], db_config["name"]),
+        immich_state=immich_state,
+        optimal_assignment=use_optimal_assignment(),
+    )
+
+
+def find_matches(
+    min_iou: float = 0.3,
+    max_center_dist: float = 0.4,
+    faces: Optional[LoadedFaces] = None,
+) -> dict:
+    """
+    Find matches between MS Photos people and Immich clusters.
+    
+    Uses filename + filesize to identify common photos, then matches faces by 
+    position (IoU overlap AND center distance) on those photos.
+    
+    When the faces are loaded here, the result is cached per threshold pair
+    and reused until either database changes.
+    
+    Args:
+        min_iou: Minimum IoU to consider faces as matching (0.3 = 30% overlap)
+        max_center_dist: Maximum normalized center distance (0.4 = centers within 40% of diagonal)
+        faces: Preloaded faces from _load_all_faces (loaded here if omitted)
+    
+    Returns:
+        Dictionary with all_matches, applicable, and stats
+    """
+    if faces is None:
+        result = _find_matches_cached(float(min_iou), float(max_center_dist), _get_match_data_token())
+    else:
+        result = _match_loaded_faces(faces, min_iou, max_center_dist)
+    
+    # Fresh containers so callers can't modify a cached result
+    return {
+        "all_matches": list(result["all_matches"]),
+        "applicable": list(result["applicable"]),
+        "stats": dict(result["stats"]),
+    }
+
+
+@lru_cache(maxsize=8)
+def _find_matches_cached(min_iou: float, max_center_dist: float, data_token: _MatchDataToken) -> dict:
+    """Load both databases and match them; data_token takes part in the cache key."""
+    return _match_loaded_faces(_load_all_faces(), min_iou, max_center_dist)
+
+
+def _match_loaded_faces(faces: LoadedFaces, min_iou: float, max_center_dist: float) -> dict:
+    """Match the faces of find_matches once they are loaded."""
+    ms_faces_by_photo, ms_people = faces.ms_faces_by_photo, faces.ms_people
+    immich_faces_by_photo, immich_clusters = faces.immich_faces_by_photo, faces.immich_clusters
     
     # ==========================================================================
     # Step 3: Find common photos and match faces by position (GREEDY MATCHING)
     # ==========================================================================
-    common_photos = set(ms_faces_by_photo.keys()) & set(immich_faces_by_photo.keys())
+    # Import here to avoid circular imports
+    from services.matching_kernel import match_photos
     
-    # Collect face-level matches: (ms_person_id, immich_cluster_id) -> [(iou, filename), ...]
-    face_matches = defaultdict(list)
+    common_photos = faces.common_photos
     
-    for photo in common_photos:
-        ms_faces = ms_faces_by_photo[photo]
-        immich_faces = immich_faces_by_photo[photo]
+    # Collect face-level matches: (ms_person_id, immich_cluster_id) -> parallel
+    # columns of IoU / center distance (unboxed doubles) and (filename, filesize)
+    face_matches = defaultdict(lambda: {"iou": array("d"), "center_dist": array("d"), "photo": []})
+    
+    if common_photos:
+        # Lay out every photo's faces as flat rect arrays plus per-photo offsets
+        # so all photos are matched in one (parallel, with numba) kernel call
+        ms_rects = np.concatenate([ms_faces_by_photo[photo]["rect"] for photo in common_photos])
+        imm_rects = np.concatenate([immich_faces_by_photo[photo]["rect"] for photo in common_photos])
+        ms_offsets = np.zeros(len(common_photos) + 1, dtype=np.int64)
+        imm_offsets = np.zeros(len(common_photos) + 1, dtype=np.int64)
+        np.cumsum([len(ms_faces_by_photo[photo]["id"]) for photo in common_photos], out=ms_offsets[1:])
+        np.cumsum([len(immich_faces_by_photo[photo]["id"]) for photo in common_photos], out=imm_offsets[1:])
         
-        # Greedy matching: find the best 1-to-1 match for faces on this photo
+        # Greedy (or optimal, if enabled) 1-to-1 matching for faces on each photo
         # This prevents one MS face from matching multiple Immich faces (or vice versa)
+        photo_idx, ms_idx, imm_idx, ious, center_dists = match_photos(
+            ms_rects, ms_offsets, imm_rects, imm_offsets, min_iou, max_center_dist,
+            optimal=use_optimal_assignment(),
+        )
         
-        # Step 3a: Collect all potential matches with IoU scores
-        potential_matches = []
-        for ms_idx, (ms_person_id, ms_name, ms_rect) in enumerate(ms_faces):
-            for imm_idx, (imm_cluster_id, imm_name, imm_rect) in enumerate(immich_faces):
-                iou = calculate_iou(ms_rect, imm_rect)
-                center_dist = calculate_center_distance(ms_rect, imm_rect)
-                # Both criteria must be satisfied (AND logic)
-                if iou >= min_iou and center_dist <= max_center_dist:
-                    potential_matches.append((iou, center_dist, ms_idx, imm_idx, ms_person_id, imm_cluster_id))
-        
-        # Step 3b: Sort by IoU descending (best matches first)
-        potential_matches.sort(key=lambda x: x[0], reverse=True)
-        
-        # Step 3c: Greedily assign matches, ensuring each face is used at most once
-        used_ms_faces = set()
-        used_imm_faces = set()
-        
-        for iou, center_dist, ms_idx, imm_idx, ms_person_id, imm_cluster_id in potential_matches:
-            if ms_idx in used_ms_faces or imm_idx in used_imm_faces:
-                continue  # This face already matched with someone else
-            
-            # Accept this match
-            used_ms_faces.add(ms_idx)
-            used_imm_faces.add(imm_idx)
-            face_matches[(ms_person_id, imm_cluster_id)].append((iou, center_dist, photo))
+        # Merge into per-pair columns in photo / acceptance order
+        for p, ms_i, imm_i, iou, center_dist in zip(
+            photo_idx.tolist(), ms_idx.tolist(), imm_idx.tolist(), ious.tolist(), center_dists.tolist()
+        ):
+            photo = common_photos[p]
+            ms_person_id = ms_faces_by_photo[photo]["id"][ms_i]
+            imm_cluster_id = immich_faces_by_photo[photo]["id"][imm_i]
+            matches = face_matches[(ms_person_id, imm_cluster_id)]
+            matches["iou"].append(iou)
+            matches["center_dist"].append(center_dist)
+            matches["photo"].append(faces.photo_keys[photo])
     
     # ==========================================================================
     # Step 4: Aggregate face matches to person-cluster matches
     # ==========================================================================
     results = []
     for (ms_person_id, imm_cluster_id), matches in face_matches.items():
-        iou_scores = [m[0] for m in matches]
-        center_dists = [m[1] for m in matches]
-        # m[2] is (filename, filesize) tuple, extract just the filename
-        sample_photos = list(set(m[2][0] for m in matches))[:5]  # Unique filenames
+        iou_scores = matches["iou"]
+        center_dists = matches["center_dist"]
+        # Each photo is a (filename, filesize) tuple, extract just the filename.
+        # Stop as soon as 5 unique filenames are seen instead of deduping them all.
+        seen_filenames = {}
+        for photo in matches["photo"]:
+            seen_filenames.setdefault(photo[0], None)
+            if len(seen_filenames) >= 5:
+                break
+        sample_photos = list(seen_filenames)
         avg_iou = sum(iou_scores) / len(iou_scores)
         avg_center_dist = sum(center_dists) / len(center_dists)
-        num_matches = len(matches)
+        num_matches = len(iou_scores)
         
         # Confidence based on number of face matches and average IoU
         if num_matches >= 5 and avg_iou >= 0.4:
@@ -286,13 +780,13 @@ def find_matches(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dict:
     applicable = [r for r in results if not r.immich_cluster_name]
     
     return {
-        "all_matches": results,
-        "applicable": applicable,
+        "all_matches": tuple(results),
+        "applicable": tuple(applicable),
         "stats": {
             "ms_people_count": len(ms_people),
             "immich_clusters_count": len(immich_clusters),
             "ms_photos_with_faces": len(ms_faces_by_photo),
-            "immich_photos_with_faces": len(immich_faces_by_photo),
+            "immich_photos_with_faces": faces.immich_photo_count,
             "common_photos": len(common_photos),
             "total_matches": len(results),
             "applicable_matches": len(applicable),
@@ -323,15 +817,21 @@ class UnmatchedPerson:
     sample_files: list[str]  # Sample filenames where this person appears
 
 
-def find_unmatched_people(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dict:
+def find_unmatched_people(
+    min_iou: float = 0.3,
+    max_center_dist: float = 0.4,
+    faces: Optional[LoadedFaces] = None,
+) -> dict:
     """
     Find MS Photos people who have no matching Immich cluster.
     
+    faces can carry preloaded faces from _load_all_faces to skip reloading them.
+    
     Returns:
         Dictionary with unmatched people and stats
     """
     # First, get all matches
-    match_result = find_matches(min_iou=min_iou, max_center_dist=max_center_dist)
+    match_result = find_matches(min_iou=min_iou, max_center_dist=max_center_dist, faces=faces)
     matched_ms_person_ids = set(m.ms_person_id for m in match_result["all_matches"])
     
     # Load all MS Photos people with their face counts and sample files
@@ -347,14 +847,13 @@ def find_unmatched_people(min_iou: float = 0.3, max_center_dist: float = 0.4) ->
             FROM Person p
             JOIN Face f ON f.Face_PersonId = p.Person_Id
             WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
               AND TRIM(p.Person_Name) != ''
             GROUP BY p.Person_Id, p.Person_Name
             ORDER BY face_count DESC
         """)
         
         all_people = {}
-        for row in ms_cursor.fetchall():
+        for row in ms_cursor:
             person_id, person_name, face_count = row
             all_people[person_id] = {
                 "name": person_name,
@@ -372,12 +871,11 @@ def find_unmatched_people(min_iou: float = 0.3, max_center_dist: float = 0.4) ->
             JOIN Item i ON f.Face_ItemId = i.Item_Id
             LEFT JOIN Folder fld ON i.Item_ParentFolderId = fld.Folder_Id
             WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
               AND TRIM(p.Person_Name) != ''
         """)
         
         files_by_person = defaultdict(list)
-        for row in ms_cursor.fetchall():
+        for row in ms_cursor:
             person_id, filename, folder_path = row
             if filename:
                 full_path = f"{folder_path}/{filename}" if folder_path else filename
@@ -410,230 +908,156 @@ def find_unmatched_people(min_iou: float = 0.3, max_center_dist: float = 0.4) ->
     }
 
 
-@dataclass
-class RawFaceMatch:
-    """A single potential face match with all metrics for analysis."""
-    ms_person_id: int
-    ms_person_name: str
-    immich_cluster_id: str
-    immich_cluster_name: Optional[str]
-    iou: float
-    center_dist: float
-    filename: str
+# Columns of get_match_analytics' raw_matches; row i of every column is one face pair
+RAW_MATCH_COLUMNS = (
+    "ms_person_id",
+    "ms_person_name",
+    "immich_cluster_id",
+    "immich_cluster_name",
+    "iou",
+    "center_dist",
+    "filename",
+)
 
 
-def get_match_analytics() -> dict:
+def get_match_analytics(faces: Optional[LoadedFaces] = None) -> dict:
     """
     Get raw matching data for analytics - ALL potential matches without filtering.
     
     This returns every face pair that shares a photo, along with their IoU and center 
     distance values, so we can analyze the distribution and find optimal thresholds.
     
+    Args:
+        faces: Preloaded faces from _load_all_faces (loaded here if omitted)
+    
     Returns:
-        Dictionary with raw_matches, histograms, and statistics
+        Dictionary with raw_matches, histograms, and statistics. raw_matches is
+        columnar: one list per name in RAW_MATCH_COLUMNS, all of the same length.
     """
     # ==========================================================================
-    # Step 1: Load MS Photos faces with positions
-    # ==========================================================================
-    with get_ms_photos_connection() as ms_conn:
-        ms_cursor = ms_conn.cursor()
-        
-        ms_cursor.execute("""
-            SELECT 
-                i.Item_FileName,
-                i.Item_FileSize,
-                p.Person_Id,
-                p.Person_Name,
-                f.Face_Rect_Top,
-                f.Face_Rect_Left,
-                f.Face_Rect_Width,
-                f.Face_Rect_Height
-            FROM Face f
-            JOIN Item i ON f.Face_ItemId = i.Item_Id
-            JOIN Person p ON f.Face_PersonId = p.Person_Id
-            WHERE p.Person_Name IS NOT NULL 
-              AND p.Person_Name != ''
-              AND TRIM(p.Person_Name) != ''
-              AND f.Face_Rect_Top IS NOT NULL
-        """)
-        
-        ms_faces_by_photo = defaultdict(list)
-        ms_people = {}
-        
-        for row in ms_cursor.fetchall():
-            filename, filesize, person_id, person_name, top, left, width, height = row
-            if not filename:
-                continue
-            key = (filename.lower(), filesize)
-            rect = ms_rect_to_normalized(top, left, width, height)
-            ms_faces_by_photo[key].append((person_id, person_name, rect))
-            ms_people[person_id] = person_name
-    
-    # ==========================================================================
-    # Step 2: Load Immich faces with positions
+    # Steps 1-2: Load MS Photos and Immich faces with positions
     # ==========================================================================
-    with get_immich_connection() as immich_conn:
-        immich_cursor = immich_conn.cursor()
-        
-        immich_cursor.execute("""
-            SELECT 
-                a."originalFileName",
-                e."fileSizeInByte",
-                af."personId",
-                p.name,
-                af."boundingBoxX1",
-                af."boundingBoxY1",
-                af."boundingBoxX2",
-                af."boundingBoxY2",
-                af."imageWidth",
-                af."imageHeight"
-            FROM asset_face af
-            JOIN asset a ON af."assetId" = a.id
-            LEFT JOIN asset_exif e ON a.id = e."assetId"
-            LEFT JOIN person p ON af."personId" = p.id
-            WHERE af."personId" IS NOT NULL
-              AND af."deletedAt" IS NULL
-              AND a."deletedAt" IS NULL
-              AND af."boundingBoxX1" IS NOT NULL
-        """)
-        
-        immich_faces_by_photo = defaultdict(list)
-        immich_clusters = {}
-        
-        for row in immich_cursor.fetchall():
-            filename, filesize, cluster_id, cluster_name, x1, y1, x2, y2, img_w, img_h = row
-            if not filename or not filesize:
-                continue
-            
-            key = (filename.lower(), filesize)
-            rect = immich_rect_to_normalized(x1, y1, x2, y2, img_w, img_h)
-            if not rect:
-                continue
-            
-            cluster_id_str = str(cluster_id)
-            immich_faces_by_photo[key].append((cluster_id_str, cluster_name, rect))
-            if cluster_id_str not in immich_clusters:
-                immich_clusters[cluster_id_str] = cluster_name
+    if faces is None:
+        faces = _load_all_faces()
+    ms_faces_by_photo, ms_people = faces.ms_faces_by_photo, faces.ms_people
+    immich_faces_by_photo, immich_clusters = faces.immich_faces_by_photo, faces.immich_clusters
     
     # ==========================================================================
     # Step 3: Find ALL face pairs on common photos and compute metrics
     # ==========================================================================
-    common_photos = set(ms_faces_by_photo.keys()) & set(immich_faces_by_photo.keys())
+    common_photos = faces.common_photos
     
-    # Collect ALL raw matches (no filtering)
-    raw_matches: list[RawFaceMatch] = []
-    iou_values = []
-    center_dist_values = []
+    # Collect ALL raw matches (no filtering), column by column
+    raw_matches = {column: [] for column in RAW_MATCH_COLUMNS}
+    iou_chunks = []
+    center_dist_chunks = []
     
-    for photo_key in common_photos:
-        filename = photo_key[0]
-        ms_faces = ms_faces_by_photo[photo_key]
-        immich_faces = immich_faces_by_photo[photo_key]
+    for photo in common_photos:
+        filename = faces.photo_keys[photo][0]
+        ms_faces = ms_faces_by_photo[photo]
+        immich_faces = immich_faces_by_photo[photo]
+        
+        iou_matrix = pairwise_iou(ms_faces["rect"], immich_faces["rect"], ms_faces["area"], immich_faces["area"])
         
-        for ms_person_id, ms_name, ms_rect in ms_faces:
-            for imm_cluster_id, imm_name, imm_rect in immich_faces:
-                iou = calculate_iou(ms_rect, imm_rect)
-                center_dist = calculate_center_distance(ms_rect, imm_rect)
-                
-                # Only include if there's ANY overlap (IoU > 0)
-                if iou > 0:
-                    raw_matches.append(RawFaceMatch(
-                        ms_person_id=ms_person_id,
-                        ms_person_name=ms_name,
-                        immich_cluster_id=imm_cluster_id,
-                        immich_cluster_name=imm_name,
-                        iou=iou,
-                        center_dist=center_dist,
-                        filename=filename,
-                    ))
-                    iou_values.append(iou)
-                    center_dist_values.append(center_dist)
+        # Only include if there's ANY overlap (IoU > 0); row-major like the face loops.
+        # Center distance is computed for those pairs alone.
+        rows, cols = np.nonzero(iou_matrix > 0)
+        ious = iou_matrix[rows, cols]
+        center_dists = paired_center_distance(ms_faces["rect"][rows], immich_faces["rect"][cols])
+        
+        ms_ids, ms_names = ms_faces["id"], ms_faces["name"]
+        imm_ids, imm_names = immich_faces["id"], immich_faces["name"]
+        rows, cols = rows.tolist(), cols.tolist()
+        raw_matches["ms_person_id"].extend([ms_ids[i] for i in rows])
+        raw_matches["ms_person_name"].extend([ms_names[i] for i in rows])
+        raw_matches["immich_cluster_id"].extend([imm_ids[j] for j in cols])
+        raw_matches["immich_cluster_name"].extend([imm_names[j] for j in cols])
+        raw_matches["iou"].extend(ious.tolist())
+        raw_matches["center_dist"].extend(center_dists.tolist())
+        raw_matches["filename"].extend([filename] * len(rows))
+        iou_chunks.append(ious)
+        center_dist_chunks.append(center_dists)
+    
+    # All pair metrics as flat float64 arrays for the statistics below
+    iou_values = np.concatenate(iou_chunks) if iou_chunks else np.empty(0)
+    center_dist_values = np.concatenate(center_dist_chunks) if center_dist_chunks else np.empty(0)
     
     # ==========================================================================
     # Step 4: Compute histograms and statistics
     # ==========================================================================
-    def compute_histogram(values: list, bins: int = 20) -> dict:
+    def compute_histogram(values: np.ndarray, bins: int = 20) -> dict:
         """Compute histogram data for visualization."""
-        if not values:
+        if len(values) == 0:
             return {"bins": [], "counts": [], "edges": []}
         
-        min_val = min(values)
-        max_val = max(values)
+        min_val = float(values.min())
+        max_val = float(values.max())
         bin_width = (max_val - min_val) / bins if max_val > min_val else 1
         
-        edges = [min_val + i * bin_width for i in range(bins + 1)]
-        counts = [0] * bins
+        edges = min_val + np.arange(bins + 1) * bin_width
         
-        for v in values:
-            bin_idx = min(int((v - min_val) / bin_width), bins - 1) if bin_width > 0 else 0
-            counts[bin_idx] += 1
+        # Equal-width bins; the maximum falls into the last bin
+        bin_idx = np.minimum(((values - min_val) / bin_width).astype(np.int64), bins - 1)
+        counts = np.bincount(bin_idx, minlength=bins)
         
         # Compute bin centers for display
-        bin_centers = [(edges[i] + edges[i + 1]) / 2 for i in range(bins)]
+        bin_centers = (edges[:-1] + edges[1:]) / 2
         
         return {
-            "bins": bin_centers,
-            "counts": counts,
-            "edges": edges,
+            "bins": bin_centers.tolist(),
+            "counts": counts.tolist(),
+            "edges": edges.tolist(),
         }
     
-    def compute_percentiles(values: list) -> dict:
-        """Compute key percentiles."""
-        if not values:
+    def compute_percentiles(values: np.ndarray) -> dict:
+        """Compute key percentiles (nearest rank, no interpolation)."""
+        if len(values) == 0:
             return {}
-        sorted_vals = sorted(values)
+        sorted_vals = np.sort(values)
         n = len(sorted_vals)
         return {
-            "p5": sorted_vals[int(n * 0.05)],
-            "p25": sorted_vals[int(n * 0.25)],
-            "p50": sorted_vals[int(n * 0.50)],
-            "p75": sorted_vals[int(n * 0.75)],
-            "p95": sorted_vals[int(n * 0.95)],
-            "min": sorted_vals[0],
-            "max": sorted_vals[-1],
-            "mean": sum(sorted_vals) / n,
+            "p5": float(sorted_vals[int(n * 0.05)]),
+            "p25": float(sorted_vals[int(n * 0.25)]),
+            "p50": float(sorted_vals[int(n * 0.50)]),
+            "p75": float(sorted_vals[int(n * 0.75)]),
+            "p95": float(sorted_vals[int(n * 0.95)]),
+            "min": float(sorted_vals[0]),
+            "max": float(sorted_vals[-1]),
+            "mean": float(sorted_vals.mean()),
         }
     
-    def find_optimal_threshold_otsu(values: list, bins: int = 100) -> float:
+    def find_optimal_threshold_otsu(values: np.ndarray, bins: int = 100) -> float:
         """
         Find optimal threshold using Otsu's method.
         Finds the threshold that minimizes intra-class variance.
         """
-        if not values or len(values) < 10:
+        if len(values) < 10:
             return 0.3  # Default
         
-        sorted_vals = sorted(values)
+        sorted_vals = np.sort(values)
         n = len(sorted_vals)
         
-        best_threshold = sorted_vals[n // 2]
-        best_variance = float('inf')
+        # Candidate thresholds are sample quantiles; class 1 is every value <= threshold
+        thresholds = sorted_vals[(n * np.arange(1, min(bins, n - 1)) / bins).astype(np.int64)]
+        n1 = np.searchsorted(sorted_vals, thresholds, side="right")
+        n2 = n - n1
+        valid = (n1 > 0) & (n2 > 0)
+        if not valid.any():
+            return float(sorted_vals[n // 2])
         
-        # Try different thresholds
-        for i in range(1, min(bins, n - 1)):
-            threshold = sorted_vals[int(n * i / bins)]
-            
-            # Split into two classes
-            class1 = [v for v in sorted_vals if v <= threshold]
-            class2 = [v for v in sorted_vals if v > threshold]
-            
-            if not class1 or not class2:
-                continue
-            
-            # Compute weighted variance
-            w1 = len(class1) / n
-            w2 = len(class2) / n
-            mean1 = sum(class1) / len(class1)
-            mean2 = sum(class2) / len(class2)
-            var1 = sum((v - mean1) ** 2 for v in class1) / len(class1)
-            var2 = sum((v - mean2) ** 2 for v in class2) / len(class2)
-            
-            within_class_var = w1 * var1 + w2 * var2
-            
-            if within_class_var < best_variance:
-                best_variance = within_class_var
-                best_threshold = threshold
+        # Prefix sums of (centered) values and squares give each split's
+        # within-class sum of squares in O(1), instead of rescanning all values
+        centered = sorted_vals - sorted_vals.mean()
+        cum = np.concatenate(([0.0], np.cumsum(centered)))
+        cum_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+        sum1, sq1 = cum[n1], cum_sq[n1]
+        sum2, sq2 = cum[-1] - sum1, cum_sq[-1] - sq1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            within_class_var = ((sq1 - sum1 * sum1 / n1) + (sq2 - sum2 * sum2 / n2)) / n
+        within_class_var[~valid] = np.inf
         
-        return best_threshold
+        # First threshold with the lowest variance
+        return float(thresholds[np.argmin(within_class_var)])
     
     # Compute stats
     iou_histogram = compute_histogram(iou_values, bins=20)
@@ -647,26 +1071,15 @@ def get_match_analytics() -> dict:
     suggested_center_dist_threshold = find_optimal_threshold_otsu(center_dist_values)
     
     # Count matches at various thresholds for CDF-like analysis
-    def count_at_thresholds(values: list, thresholds: list) -> list:
-        return [sum(1 for v in values if v >= t) / len(values) * 100 if values else 0 
+    def count_at_thresholds(values: np.ndarray, thresholds: list) -> list:
+        return [np.count_nonzero(values >= t) / len(values) * 100 if len(values) else 0 
                 for t in thresholds]
     
     iou_thresholds = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
     center_dist_thresholds = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
     
     return {
-        "raw_matches": [
-            {
-                "ms_person_id": m.ms_person_id,
-                "ms_person_name": m.ms_person_name,
-                "immich_cluster_id": m.immich_cluster_id,
-                "immich_cluster_name": m.immich_cluster_name,
-                "iou": m.iou,
-                "center_dist": m.center_dist,
-                "filename": m.filename,
-            }
-            for m in raw_matches
-        ],
+        "raw_matches": raw_matches,
         "histograms": {
             "iou": iou_histogram,
             "center_dist": center_dist_histogram,
@@ -687,13 +1100,13 @@ def get_match_analytics() -> dict:
             "center_dist": {
                 "thresholds": center_dist_thresholds,
                 "percent_below": [100 - p for p in count_at_thresholds(
-                    [1 - v for v in center_dist_values],  # Invert for "below" semantics
+                    1 - center_dist_values,  # Invert for "below" semantics
                     [1 - t for t in center_dist_thresholds]
                 )],
             },
         },
         "stats": {
-            "total_raw_matches": len(raw_matches),
+            "total_raw_matches": len(raw_matches["iou"]),
             "common_photos": len(common_photos),
             "ms_people_count": len(ms_people),
             "ms_unique_people_count": len(set(ms_people.values())),
@@ -717,11 +1130,14 @@ def run_full_analysis(min_iou: float = 0.3, max_center_dist: float = 0.4) -> dic
     from services.cluster_validation import validate_clusters, find_mergeable_clusters
     from services.apply_labels import find_unclustered_matches, preview_to_dict
     
+    # Load both databases once for analytics and matching
+    faces = _load_all_faces()
+    
     # Get analytics data (raw matches + histograms)
-    analytics = get_match_analytics()
+    analytics = get_match_analytics(faces=faces)
     
     # Get filtered matches using thresholds
-    matches_result = find_matches(min_iou=min_iou, max_center_dist=max_center_dist)
+    matches_result = find_matches(min_iou=min_iou, max_center_dist=max_center_dist, faces=faces)
     
     # Get validation issues
     validation_result = validate_clusters(
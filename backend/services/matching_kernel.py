@@ -0,0 +1,343 @@
+"""
+Per-photo face matching kernel.
+
+Computes IoU / center distance for every MS x Immich face pair on one photo
+and performs the greedy 1-to-1 assignment in a single call. When numba is
+installed the whole kernel is JIT-compiled to native code; otherwise it falls
+back to the vectorized NumPy implementation in services.matching.
+
+match_photos runs the same assignment for many photos at once, taking the
+faces of all photos as flat rect arrays plus per-photo offsets; with numba
+the photos are spread across all cores.
+
+Both entry points can instead compute the optimal (Hungarian) assignment
+with optimal=True; that path needs scipy and always runs on NumPy.
+"""
+
+from collections import defaultdict
+from operator import itemgetter
+import sys
+import os
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.matching import (
+    pairwise_iou,
+    pairwise_center_distance,
+    greedy_match,
+    optimal_match,
+    calculate_iou,
+    calculate_center_distance,
+    _iou_scalar_nb,
+    _center_dist_scalar_nb,
+)
+
+# Photos with at most this many MS x Immich face pairs are matched with plain
+# scalar code; building NumPy matrices costs more than it saves at this size
+SCALAR_MAX_PAIRS = 4
+
+
+def _greedy_match_kernel(ms_rects, imm_rects, min_iou, max_center_dist):
+    """
+    Numba-compatible greedy matching over two (N, 4) / (M, 4) float64 rect arrays.
+    
+    Mirrors calculate_iou, calculate_center_distance and greedy_match exactly.
+    """
+    n = ms_rects.shape[0]
+    m = imm_rects.shape[0]
+    
+    # Disjoint rects have IoU 0, so they can only qualify with a zero threshold
+    skip_disjoint = min_iou > 0
+    
+    # Collect qualifying pairs into buffers sized for the worst case
+    cand_ms = np.empty(n * m, dtype=np.int64)
+    cand_imm = np.empty(n * m, dtype=np.int64)
+    cand_iou = np.empty(n * m, dtype=np.float64)
+    cand_cd = np.empty(n * m, dtype=np.float64)
+    count = 0
+    
+    for i in range(n):
+        ax1, ay1, ax2, ay2 = ms_rects[i, 0], ms_rects[i, 1], ms_rects[i, 2], ms_rects[i, 3]
+        for j in range(m):
+            bx1, by1, bx2, by2 = imm_rects[j, 0], imm_rects[j, 1], imm_rects[j, 2], imm_rects[j, 3]
+            
+            if skip_disjoint and (ax2 <= bx1 or bx2 <= ax1 or ay2 <= by1 or by2 <= ay1):
+                continue
+            
+            iou = _iou_scalar_nb(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2)
+            if iou < min_iou:
+                continue
+            
+            center_dist = _center_dist_scalar_nb(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2)
+            if center_dist > max_center_dist:
+                continue
+            
+            cand_ms[count] = i
+            cand_imm[count] = j
+            cand_iou[count] = iou
+            cand_cd[count] = center_dist
+            count += 1
+    
+    # Best IoU first; mergesort is stable so ties keep row-major order
+    order = np.argsort(-cand_iou[:count], kind="mergesort")
+    
+    used_ms = np.zeros(n, dtype=np.bool_)
+    used_imm = np.zeros(m, dtype=np.bool_)
+    out_ms = np.empty(count, dtype=np.int64)
+    out_imm = np.empty(count, dtype=np.int64)
+    out_iou = np.empty(count, dtype=np.float64)
+    out_cd = np.empty(count, dtype=np.float64)
+    matched = 0
+    
+    for k in order:
+        i = cand_ms[k]
+        j = cand_imm[k]
+        if used_ms[i] or used_imm[j]:
+            continue
+        used_ms[i] = True
+        used_imm[j] = True
+        out_ms[matched] = i
+        out_imm[matched] = j
+        out_iou[matched] = cand_iou[k]
+        out_cd[matched] = cand_cd[k]
+        matched += 1
+    
+    return out_ms[:matched], out_imm[:matched], out_iou[:matched], out_cd[:matched]
+
+
+if HAS_NUMBA:
+    _greedy_match_jit = njit(cache=True)(_greedy_match_kernel)
+    
+    @njit(cache=True, parallel=True)
+    def _match_photos_jit(ms_rects, ms_offsets, imm_rects, imm_offsets, min_iou, max_center_dist):
+        """
+        Run the greedy kernel for every photo of a flat (rects, offsets) layout.
+        
+        Photos are independent, so they are matched in parallel (prange). Each
+        photo writes into its own slice of the output, sized for its maximum of
+        min(N, M) matches; the slices are compacted in photo order afterwards.
+        """
+        num_photos = ms_offsets.shape[0] - 1
+        
+        # A photo can produce at most min(N, M) matches
+        slot_offsets = np.zeros(num_photos + 1, dtype=np.int64)
+        for p in range(num_photos):
+            slot_offsets[p + 1] = slot_offsets[p] + min(
+                ms_offsets[p + 1] - ms_offsets[p], imm_offsets[p + 1] - imm_offsets[p]
+            )
+        capacity = slot_offsets[num_photos]
+        
+        slot_ms = np.empty(capacity, dtype=np.int64)
+        slot_imm = np.empty(capacity, dtype=np.int64)
+        slot_iou = np.empty(capacity, dtype=np.float64)
+        slot_cd = np.empty(capacity, dtype=np.float64)
+        matched = np.zeros(num_photos, dtype=np.int64)
+        
+        for p in prange(num_photos):
+            ms_idx, imm_idx, iou, cd = _greedy_match_jit(
+                ms_rects[ms_offsets[p]:ms_offsets[p + 1]],
+                imm_rects[imm_offsets[p]:imm_offsets[p + 1]],
+                min_iou,
+                max_center_dist,
+            )
+            start = slot_offsets[p]
+            for k in range(ms_idx.shape[0]):
+                slot_ms[start + k] = ms_idx[k]
+                slot_imm[start + k] = imm_idx[k]
+                slot_iou[start + k] = iou[k]
+                slot_cd[start + k] = cd[k]
+            matched[p] = ms_idx.shape[0]
+        
+        total = 0
+        for p in range(num_photos):
+            total += matched[p]
+        
+        out_photo = np.empty(total, dtype=np.int64)
+        out_ms = np.empty(total, dtype=np.int64)
+        out_imm = np.empty(total, dtype=np.int64)
+        out_iou = np.empty(total, dtype=np.float64)
+        out_cd = np.empty(total, dtype=np.float64)
+        pos = 0
+        for p in range(num_photos):
+            start = slot_offsets[p]
+            for k in range(matched[p]):
+                out_photo[pos] = p
+                out_ms[pos] = slot_ms[start + k]
+                out_imm[pos] = slot_imm[start + k]
+                out_iou[pos] = slot_iou[start + k]
+                out_cd[pos] = slot_cd[start + k]
+                pos += 1
+        
+        return out_photo, out_ms, out_imm, out_iou, out_cd
+
+
+def _match_small(ms_rects: list, imm_rects: list, min_iou: float, max_center_dist: float):
+    """Scalar greedy matching for photos with only a handful of face pairs."""
+    candidates = []
+    for i, ms_rect in enumerate(ms_rects):
+        for j, imm_rect in enumerate(imm_rects):
+            iou = calculate_iou(ms_rect, imm_rect)
+            if iou < min_iou:
+                continue
+            center_dist = calculate_center_distance(ms_rect, imm_rect)
+            if center_dist <= max_center_dist:
+                candidates.append((iou, i, j, center_dist))
+    
+    # Best IoU first; reverse sorts stay stable, so ties keep row-major order
+    candidates.sort(key=itemgetter(0), reverse=True)
+    
+    used_ms, used_imm = set(), set()
+    accepted = []
+    for iou, i, j, center_dist in candidates:
+        if i in used_ms or j in used_imm:
+            continue
+        used_ms.add(i)
+        used_imm.add(j)
+        accepted.append((i, j, iou, center_dist))
+    
+    ms_idx = np.array([a[0] for a in accepted], dtype=np.int64)
+    imm_idx = np.array([a[1] for a in accepted], dtype=np.int64)
+    ious = np.array([a[2] for a in accepted], dtype=np.float64)
+    center_dists = np.array([a[3] for a in accepted], dtype=np.float64)
+    return ms_idx, imm_idx, ious, center_dists
+
+
+def match_photo_faces(
+    ms_rects: np.ndarray,
+    imm_rects: np.ndarray,
+    min_iou: float,
+    max_center_dist: float,
+    optimal: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Greedily match the faces of one photo.
+    
+    Args:
+        ms_rects: (N, 4) normalized MS Photos rects
+        imm_rects: (M, 4) normalized Immich rects
+        optimal: use the optimal (Hungarian) assignment instead of greedy
+    
+    Returns:
+        (ms_idx, imm_idx, iou, center_dist) arrays, one entry per accepted match,
+        in the order the greedy assignment accepted them
+    """
+    ms_rects = np.ascontiguousarray(ms_rects, dtype=np.float64).reshape(-1, 4)
+    imm_rects = np.ascontiguousarray(imm_rects, dtype=np.float64).reshape(-1, 4)
+    
+    if HAS_NUMBA and not optimal:
+        return _greedy_match_jit(ms_rects, imm_rects, float(min_iou), float(max_center_dist))
+    
+    if not optimal and len(ms_rects) * len(imm_rects) <= SCALAR_MAX_PAIRS:
+        return _match_small(ms_rects.tolist(), imm_rects.tolist(), min_iou, max_center_dist)
+    
+    iou_matrix = pairwise_iou(ms_rects, imm_rects)
+    center_dist_matrix = pairwise_center_distance(ms_rects, imm_rects)
+    assign = optimal_match if optimal else greedy_match
+    pairs = assign(iou_matrix, center_dist_matrix, min_iou, max_center_dist)
+    ms_idx = np.array([p[0] for p in pairs], dtype=np.int64)
+    imm_idx = np.array([p[1] for p in pairs], dtype=np.int64)
+    return ms_idx, imm_idx, iou_matrix[ms_idx, imm_idx], center_dist_matrix[ms_idx, imm_idx]
+
+
+def _match_photos_numpy(ms_rects, ms_offsets, imm_rects, imm_offsets, min_iou, max_center_dist, assign=greedy_match):
+    """
+    NumPy fallback for match_photos.
+    
+    Photos are grouped by their (MS faces, Immich faces) shape so each group is
+    stacked into (P, N, 4) / (P, M, 4) arrays without padding, and IoU / center
+    distance for the whole group come out of a single broadcast.
+    """
+    ms_counts = np.diff(ms_offsets)
+    imm_counts = np.diff(imm_offsets)
+    
+    photos_by_shape = defaultdict(list)
+    for p, shape in enumerate(zip(ms_counts.tolist(), imm_counts.tolist())):
+        if shape[0] and shape[1]:
+            photos_by_shape[shape].append(p)
+    
+    results = []
+    for (n, m), photos in photos_by_shape.items():
+        photos = np.array(photos, dtype=np.int64)
+        ms_stack = ms_rects[ms_offsets[photos][:, None] + np.arange(n)]
+        imm_stack = imm_rects[imm_offsets[photos][:, None] + np.arange(m)]
+        
+        iou_tensor = pairwise_iou(ms_stack, imm_stack)
+        
+        # Only photos with at least one pair over the IoU threshold can produce
+        # a match; skip center distances and assignment for the rest
+        live = np.flatnonzero((iou_tensor >= min_iou).any(axis=(1, 2)))
+        if live.size == 0:
+            continue
+        iou_tensor = iou_tensor[live]
+        center_dist_tensor = pairwise_center_distance(ms_stack[live], imm_stack[live])
+        
+        for k, p in enumerate(photos[live].tolist()):
+            for i, j in assign(iou_tensor[k], center_dist_tensor[k], min_iou, max_center_dist):
+                results.append((p, i, j, iou_tensor[k, i, j], center_dist_tensor[k, i, j]))
+    
+    if not results:
+        empty_i = np.empty(0, dtype=np.int64)
+        empty_f = np.empty(0, dtype=np.float64)
+        return empty_i, empty_i, empty_i, empty_f, empty_f
+    
+    photo, ms_idx, imm_idx, iou, cd = (np.array(col) for col in zip(*results))
+    
+    # Keep photo order (and accept order within a photo) like the JIT kernel
+    order = np.argsort(photo, kind="stable")
+    return (
+        photo[order].astype(np.int64),
+        ms_idx[order].astype(np.int64),
+        imm_idx[order].astype(np.int64),
+        iou[order].astype(np.float64),
+        cd[order].astype(np.float64),
+    )
+
+
+def match_photos(
+    ms_rects: np.ndarray,
+    ms_offsets: np.ndarray,
+    imm_rects: np.ndarray,
+    imm_offsets: np.ndarray,
+    min_iou: float,
+    max_center_dist: float,
+    optimal: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Greedily match the faces of many photos in one call.
+    
+    Args:
+        ms_rects: (total_ms, 4) normalized MS Photos rects of all photos, concatenated
+        ms_offsets: (P + 1,) start offsets into ms_rects; photo p owns
+            ms_rects[ms_offsets[p]:ms_offsets[p + 1]]
+        imm_rects: (total_imm, 4) normalized Immich rects, concatenated the same way
+        imm_offsets: (P + 1,) start offsets into imm_rects
+        optimal: use the optimal (Hungarian) assignment instead of greedy
+    
+    Returns:
+        (photo_idx, ms_idx, imm_idx, iou, center_dist) arrays, one entry per
+        accepted match. ms_idx / imm_idx are local to their photo.
+    """
+    ms_rects = np.ascontiguousarray(ms_rects, dtype=np.float64).reshape(-1, 4)
+    imm_rects = np.ascontiguousarray(imm_rects, dtype=np.float64).reshape(-1, 4)
+    ms_offsets = np.ascontiguousarray(ms_offsets, dtype=np.int64)
+    imm_offsets = np.ascontiguousarray(imm_offsets, dtype=np.int64)
+    
+    if optimal:
+        return _match_photos_numpy(
+            ms_rects, ms_offsets, imm_rects, imm_offsets, float(min_iou), float(max_center_dist),
+            assign=optimal_match,
+        )
+    if HAS_NUMBA:
+        return _match_photos_jit(
+            ms_rects, ms_offsets, imm_rects, imm_offsets, float(min_iou), float(max_center_dist)
+        )
+    return _match_photos_numpy(
+        ms_rects, ms_offsets, imm_rects, imm_offsets, float(min_iou), float(max_center_dist)
+    )
@@ -2,12 +2,23 @@
 Thumbnail service for generating face crops.
 """
 
-from pathlib import Path
 from io import BytesIO
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from functools import lru_cache
 from typing import Optional
 import base64
+import hashlib
+import math
+import re
+import tempfile
+import threading
+import time
 import sys
 import os
+import numpy as np
+from psycopg2.extras import execute_values
 
 try:
     from PIL import Image
@@ -15,37 +26,92 @@ try:
 except ImportError:
     HAS_PIL = False
 
+# Optional: libjpeg-turbo bindings, faster than Pillow's JPEG encoder
+try:
+    import simplejpeg
+    HAS_SIMPLEJPEG = True
+except ImportError:
+    HAS_SIMPLEJPEG = False
+
+# Optional: OpenCV's area-averaging resize, much faster than Pillow's LANCZOS
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+# Optional: libvips decodes only as much of the photo as the face crop needs
+try:
+    import pyvips
+    HAS_PYVIPS = True
+except (ImportError, OSError):  # OSError: pyvips is installed but libvips isn't
+    HAS_PYVIPS = False
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import get_settings
 from database import get_ms_photos_connection, get_immich_connection
 
+# Longest side of generated face thumbnails, in pixels
+THUMBNAIL_SIZE = 200
+
+
+# settings.path_mappings as (container_path, windows_path) pairs, longest prefix first;
+# rebuilt whenever the settings hold a different mappings dict
+_path_mappings_source: Optional[dict] = None
+_sorted_path_mappings: tuple = ()
+
+
+def _get_sorted_path_mappings() -> tuple:
+    """Get the configured path mappings, sorted once so the most specific prefix wins."""
+    global _path_mappings_source, _sorted_path_mappings
+    path_mappings = get_settings().path_mappings
+    if path_mappings is not _path_mappings_source:
+        _sorted_path_mappings = tuple(sorted(path_mappings.items(), key=lambda kv: -len(kv[0])))
+        _path_mappings_source = path_mappings
+    return _sorted_path_mappings
+
 
 def convert_immich_path_to_windows(immich_path: str) -> str:
     """Convert Immich container path to Windows path."""
-    settings = get_settings()
-    
-    for container_path, windows_path in settings.path_mappings.items():
+    for container_path, windows_path in _get_sorted_path_mappings():
         if immich_path.startswith(container_path):
-            return immich_path.replace(container_path, windows_path, 1)
+            return windows_path + immich_path[len(container_path):]
     
     return immich_path
 
 
-def get_immich_photo_paths() -> dict[str, str]:
-    """Get filename -> full path mapping from Immich."""
-    with get_immich_connection() as conn:
-        cursor = conn.cursor()
+def get_immich_photo_paths(filenames) -> dict[str, str]:
+    """
+    Get lowercase filename -> full path mapping from Immich for the given lowercase filenames.
+    
+    The filenames are staged in a temp table and joined against asset in the
+    database (using idx_asset_filename_lower), so only the needed paths are
+    sent back instead of every asset in the library.
+    """
+    filenames = {filename for filename in filenames if filename}
+    if not filenames:
+        return {}
+    
+    with get_immich_connection() as conn, closing(conn.cursor()) as cursor:
+        cursor.execute("CREATE TEMP TABLE thumbnail_files (filename text PRIMARY KEY) ON COMMIT DROP")
+        execute_values(cursor, "INSERT INTO thumbnail_files (filename) VALUES %s", [(f,) for f in filenames])
         cursor.execute('''
-            SELECT LOWER("originalFileName"), "originalPath"
-            FROM asset
-            WHERE "deletedAt" IS NULL AND "originalPath" IS NOT NULL
+            SELECT LOWER(a."originalFileName"), a."originalPath"
+            FROM asset a
+            JOIN thumbnail_files t ON LOWER(a."originalFileName") = t.filename
+            WHERE a."deletedAt" IS NULL AND a."originalPath" IS NOT NULL
         ''')
         
-        return {row[0]: row[1] for row in cursor.fetchall() if row[0] and row[1]}
+        return {filename: path for filename, path in cursor}
 
 
+@lru_cache(maxsize=1)
 def get_ms_face_data() -> dict:
-    """Get face rectangles and photo info for MS Photos people."""
+    """
+    Get face rectangles and photo info for MS Photos people.
+    
+    Cached across thumbnail requests; call invalidate_face_caches() to reload.
+    """
     with get_ms_photos_connection() as conn:
         cursor = conn.cursor()
         
@@ -65,8 +131,7 @@ def get_ms_face_data() -> dict:
         """)
         
         result = {}
-        for row in cursor.fetchall():
-            person_id, name, filename, top, left, width, height = row
+        for person_id, name, filename, top, left, width, height in cursor:
             result[person_id] = {
                 'name': name,
                 'filename': filename.lower() if filename else None,
@@ -76,92 +141,547 @@ def get_ms_face_data() -> dict:
         return result
 
 
+# Seconds before the file checks in the person path index are redone in the background
+PATH_INDEX_REVALIDATE_SECONDS = 300
+
+# person_id -> (local photo path, rect, photo mtime or None if the file is missing),
+# built lazily by get_person_path_index()
+_person_path_index: Optional[dict[int, tuple[str, tuple, Optional[float]]]] = None
+_person_path_index_checked_at = 0.0
+_person_path_index_revalidating = False
+_person_path_index_lock = threading.Lock()
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    """Modification time of a file, or None if it can't be read."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _check_person_photos(sources: dict[int, tuple[str, tuple]]) -> dict[int, tuple[str, tuple, Optional[float]]]:
+    """Add each photo's mtime (None if missing) to the sources, statting the files in parallel."""
+    mtimes = _get_thumbnail_executor().map(_file_mtime, [path for path, _ in sources.values()])
+    return {
+        person_id: (path, rect, mtime)
+        for (person_id, (path, rect)), mtime in zip(sources.items(), mtimes)
+    }
+
+
+def _build_person_path_index() -> dict[int, tuple[str, tuple, Optional[float]]]:
+    """
+    Join MS Photos best faces with Immich photo paths, once for all people.
+    
+    People without a best face or whose photo isn't in Immich are left out.
+    Each local photo is checked once here, so thumbnail requests don't have to.
+    """
+    face_data = get_ms_face_data()
+    photo_paths = get_immich_photo_paths(
+        person_info['filename'] for person_info in face_data.values() if person_info['rect']
+    )
+    
+    sources = {}
+    for person_id, person_info in face_data.items():
+        filename = person_info['filename']
+        rect = person_info['rect']
+        if not filename or not rect:
+            continue
+        
+        image_path = photo_paths.get(filename)
+        if image_path:
+            sources[person_id] = (convert_immich_path_to_windows(image_path), rect)
+    
+    return _check_person_photos(sources)
+
+
+def _revalidate_person_path_index(index: dict) -> None:
+    """Redo the file checks of the index and swap in the result, unless it was invalidated meanwhile."""
+    global _person_path_index, _person_path_index_checked_at, _person_path_index_revalidating
+    try:
+        refreshed = _check_person_photos({
+            person_id: (path, rect) for person_id, (path, rect, _) in index.items()
+        })
+    except Exception:
+        refreshed = None
+    
+    with _person_path_index_lock:
+        if refreshed is not None and _person_path_index is index:
+            _person_path_index = refreshed
+            _person_path_index_checked_at = time.monotonic()
+        _person_path_index_revalidating = False
+
+
+def get_person_path_index() -> dict[int, tuple[str, tuple, Optional[float]]]:
+    """
+    Get the person_id -> (local photo path, rect, photo mtime) index, building it on first use.
+    
+    Once the file checks are older than PATH_INDEX_REVALIDATE_SECONDS they are
+    redone in a background thread while the current index keeps being served.
+    """
+    global _person_path_index, _person_path_index_checked_at, _person_path_index_revalidating
+    with _person_path_index_lock:
+        if _person_path_index is None:
+            _person_path_index = _build_person_path_index()
+            _person_path_index_checked_at = time.monotonic()
+        elif (not _person_path_index_revalidating
+              and time.monotonic() - _person_path_index_checked_at > PATH_INDEX_REVALIDATE_SECONDS):
+            _person_path_index_revalidating = True
+            threading.Thread(
+                target=_revalidate_person_path_index, args=(_person_path_index,), daemon=True
+            ).start()
+        return _person_path_index
+
+
+def invalidate_face_caches() -> None:
+    """Drop the cached face data and person index (e.g. after a database change)."""
+    global _person_path_index
+    with _person_path_index_lock:
+        _person_path_index = None
+        get_ms_face_data.cache_clear()
+
+
 def crop_face_from_image(image_path: str, rect: tuple, padding: float = 0.3) -> Optional[bytes]:
     """
     Crop face from image using normalized rectangle coordinates.
     
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file (Immich path, mapped to a local one)
         rect: (top, left, width, height) normalized 0-1
         padding: Extra padding around face (0.3 = 30%)
     
     Returns:
         JPEG bytes of cropped face, or None if failed
     """
+    return _crop_face_from_local_image(convert_immich_path_to_windows(image_path), rect, padding)
+
+
+def _crop_face_from_local_image(windows_path: str, rect: tuple, padding: float = 0.3) -> Optional[bytes]:
+    """crop_face_from_image for a path that is already mapped to the local filesystem."""
+    return _crop_faces_from_local_image(windows_path, [rect], padding)[0]
+
+
+def _crop_faces_from_local_image(windows_path: str, rects: list, padding: float = 0.3) -> list[Optional[bytes]]:
+    """
+    Crop several faces from one local image, decoding it only once.
+    
+    Returns JPEG bytes (or None if that face failed) for each rect, in order.
+    """
+    # Rects with NULL columns get no thumbnail without failing the photo's other faces
+    usable = [i for i, rect in enumerate(rects) if None not in rect]
+    if len(usable) < len(rects):
+        thumbnails = [None] * len(rects)
+        if usable:
+            cropped = _crop_faces_from_local_image(windows_path, [rects[i] for i in usable], padding)
+            for i, thumb_bytes in zip(usable, cropped):
+                thumbnails[i] = thumb_bytes
+        return thumbnails
+    
+    if HAS_PYVIPS:
+        try:
+            return _crop_faces_with_vips(windows_path, rects, padding)
+        except Exception:
+            pass  # Missing file, a format libvips can't load or a bad rect; try Pillow
+    
     if not HAS_PIL:
-        return None
+        return [None] * len(rects)
     
     try:
-        windows_path = convert_immich_path_to_windows(image_path)
-        
-        if not Path(windows_path).exists():
-            return None
-        
         with Image.open(windows_path) as img:
-            img_width, img_height = img.size
-            
-            top_val, left, width, height = rect
+            # Let libjpeg decode JPEGs at 1/2, 1/4 or 1/8 scale, as long as every face
+            # itself stays at least THUMBNAIL_SIZE pixels across (no-op for other formats)
+            face_px = min(max(width * img.width, height * img.height) for _, _, width, height in rects)
+            if face_px > THUMBNAIL_SIZE:
+                scale = THUMBNAIL_SIZE / face_px
+                img.draft('RGB', (math.ceil(img.width * scale), math.ceil(img.height * scale)))
             
-            # MS Photos 'top' is the bottom of the face rectangle
-            actual_top = top_val - height
-            
-            # Convert normalized coords to pixels
-            x1 = int(left * img_width)
-            y1 = int(actual_top * img_height)
-            x2 = int((left + width) * img_width)
-            y2 = int(top_val * img_height)
-            
-            # Add padding
-            pad_w = int(width * img_width * padding)
-            pad_h = int(height * img_height * padding)
-            
-            x1 = max(0, x1 - pad_w)
-            y1 = max(0, y1 - pad_h)
-            x2 = min(img_width, x2 + pad_w)
-            y2 = min(img_height, y2 + pad_h)
-            
-            if x2 <= x1 or y2 <= y1:
-                return None
-            
-            face_img = img.crop((x1, y1, x2, y2))
-            face_img.thumbnail((200, 200), Image.Resampling.LANCZOS)
+            img_width, img_height = img.size
             
-            buffer = BytesIO()
-            face_img.convert('RGB').save(buffer, format='JPEG', quality=85)
-            return buffer.getvalue()
+            thumbnails = []
+            for box in _face_crop_boxes(rects, img_width, img_height, padding):
+                try:
+                    thumbnails.append(_encode_face_thumbnail(img.crop(box)) if box else None)
+                except Exception:
+                    thumbnails.append(None)
+            return thumbnails
             
     except Exception:
+        return [None] * len(rects)
+
+
+def _crop_faces_with_vips(windows_path: str, rects: list, padding: float) -> list[Optional[bytes]]:
+    """
+    _crop_faces_from_local_image using libvips.
+    
+    JPEGs are shrunk on load like Image.draft, and a single face is read with
+    sequential access so decoding stops once the rows of its crop are reached.
+    """
+    header = pyvips.Image.new_from_file(windows_path)
+    options = {"access": "sequential"} if len(rects) == 1 else {}
+    if header.get("vips-loader") == "jpegload":
+        face_px = min(max(width * header.width, height * header.height) for _, _, width, height in rects)
+        shrink = 1
+        while shrink < 8 and face_px / (shrink * 2) >= THUMBNAIL_SIZE:
+            shrink *= 2
+        if shrink > 1:
+            options["shrink"] = shrink
+    
+    image = pyvips.Image.new_from_file(windows_path, **options)
+    if image.hasalpha():
+        image = image.flatten()
+    if image.interpretation != "srgb":
+        image = image.colourspace("srgb")
+    
+    thumbnails = []
+    for box in _face_crop_boxes(rects, image.width, image.height, padding):
+        if not box:
+            thumbnails.append(None)
+            continue
+        
+        x1, y1, x2, y2 = box
+        face = image.crop(x1, y1, x2 - x1, y2 - y1)
+        face = face.thumbnail_image(THUMBNAIL_SIZE, height=THUMBNAIL_SIZE, size="down")
+        thumbnails.append(face.jpegsave_buffer(Q=85))
+    return thumbnails
+
+
+def _face_crop_boxes(rects: list, img_width: int, img_height: int, padding: float) -> list[Optional[tuple[int, int, int, int]]]:
+    """
+    Padded pixel boxes (x1, y1, x2, y2) of MS Photos face rects, None where a box is empty.
+    
+    Computed for all faces of a photo at once, with the same truncation as int().
+    """
+    top, left, width, height = np.asarray(rects, dtype=np.float64).reshape(-1, 4).T
+    
+    # MS Photos 'top' is the bottom of the face rectangle
+    actual_top = top - height
+    
+    # Convert normalized coords to pixels
+    x1 = (left * img_width).astype(np.int64)
+    y1 = (actual_top * img_height).astype(np.int64)
+    x2 = ((left + width) * img_width).astype(np.int64)
+    y2 = (top * img_height).astype(np.int64)
+    
+    # Add padding
+    pad_w = (width * img_width * padding).astype(np.int64)
+    pad_h = (height * img_height * padding).astype(np.int64)
+    
+    x1 = np.maximum(0, x1 - pad_w)
+    y1 = np.maximum(0, y1 - pad_h)
+    x2 = np.minimum(img_width, x2 + pad_w)
+    y2 = np.minimum(img_height, y2 + pad_h)
+    
+    boxes = np.stack([x1, y1, x2, y2], axis=1).tolist()
+    valid = ((x2 > x1) & (y2 > y1)).tolist()
+    return [tuple(box) if ok else None for box, ok in zip(boxes, valid)]
+
+
+def _encode_face_thumbnail(face_img) -> bytes:
+    """Shrink a cropped face image to THUMBNAIL_SIZE and encode it as JPEG."""
+    if HAS_CV2:
+        return _encode_jpeg(_resize_to_fit(np.asarray(_as_rgb(face_img)), THUMBNAIL_SIZE))
+    
+    face_img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+    return _encode_jpeg(_as_rgb(face_img))
+
+
+def _as_rgb(img):
+    """Return img in RGB mode, skipping the copy convert() makes when it already is."""
+    return img if img.mode == 'RGB' else img.convert('RGB')
+
+
+def _resize_to_fit(pixels: np.ndarray, max_size: int) -> np.ndarray:
+    """
+    Shrink an (H, W, 3) image with OpenCV so its longest side is at most max_size.
+    
+    Keeps the aspect ratio and never enlarges, like Image.thumbnail.
+    """
+    height, width = pixels.shape[:2]
+    if max(width, height) <= max_size:
+        return pixels
+    
+    scale = max_size / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+
+
+def _encode_jpeg(img, quality: int = 85) -> bytes:
+    """Encode an RGB PIL image or (H, W, 3) uint8 array as JPEG, using simplejpeg when installed."""
+    if HAS_SIMPLEJPEG:
+        # 4:2:0 chroma subsampling, like Pillow's default at this quality
+        return simplejpeg.encode_jpeg(np.ascontiguousarray(img), quality=quality, colorspace='RGB', colorsubsampling='420')
+    
+    if isinstance(img, np.ndarray):
+        img = Image.fromarray(img)
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def _thumbnail_cache_key(person_id: int, rect: tuple, source_mtime: float) -> str:
+    """Cache key for a face thumbnail; changes whenever the face or its source photo does."""
+    return hashlib.sha1(f"{person_id}:{rect}:{source_mtime}".encode()).hexdigest()
+
+
+def _read_cached_thumbnail(key: str) -> Optional[bytes]:
+    """Read a JPEG thumbnail from the disk cache, or None if it isn't cached."""
+    try:
+        return (get_settings().thumbnail_cache_path / f"{key}.jpg").read_bytes()
+    except OSError:
         return None
 
 
-def get_ms_person_thumbnail(person_id: int) -> Optional[str]:
+def _write_cached_thumbnail(key: str, thumb_bytes: bytes) -> None:
+    """Store a JPEG thumbnail in the disk cache (best effort, atomic replace)."""
+    cache_dir = get_settings().thumbnail_cache_path
+    tmp_path = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(thumb_bytes)
+        os.replace(tmp_path, cache_dir / f"{key}.jpg")
+    except OSError:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def sweep_thumbnail_cache() -> int:
     """
-    Get base64-encoded thumbnail for an MS Photos person.
+    Remove cached thumbnails older than thumbnail_cache_max_age_days.
     
-    Returns the "best face" image cropped from the original photo.
+    Returns the number of files removed.
     """
-    face_data = get_ms_face_data()
-    person_info = face_data.get(person_id)
+    settings = get_settings()
+    cache_dir = settings.thumbnail_cache_path
+    if settings.thumbnail_cache_max_age_days <= 0 or not cache_dir.is_dir():
+        return 0
+    
+    cutoff = time.time() - settings.thumbnail_cache_max_age_days * 86400
+    removed = 0
+    for entry in os.scandir(cache_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+# Shared by all batch requests so concurrent handlers don't oversubscribe the CPU
+_thumbnail_executor: Optional[ThreadPoolExecutor] = None
+_thumbnail_executor_lock = threading.Lock()
+
+
+def _get_thumbnail_executor() -> ThreadPoolExecutor:
+    """Get the thread pool for thumbnail generation, creating it on first use."""
+    global _thumbnail_executor
+    with _thumbnail_executor_lock:
+        if _thumbnail_executor is None:
+            _thumbnail_executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix="thumbnails",
+            )
+        return _thumbnail_executor
+
+
+def _thumbnail_source(person_id: int) -> Optional[tuple[str, tuple, str]]:
+    """Local photo path, face rect and cache key for a person's thumbnail, or None."""
+    entry = get_person_path_index().get(person_id)
     
-    if not person_info:
+    if not entry:
         return None
     
-    filename = person_info.get('filename')
-    rect = person_info.get('rect')
+    windows_path, rect, source_mtime = entry
+    
+    if source_mtime is None:
+        return None  # Photo not found locally when the index was last checked
+    
+    return windows_path, rect, _thumbnail_cache_key(person_id, rect, source_mtime)
+
+
+def get_ms_person_thumbnail_key(person_id: int) -> Optional[str]:
+    """
+    Cache key of a person's thumbnail (see get_cached_ms_person_thumbnail).
+    
+    Only looks at the person path index; nothing is read from disk.
+    """
+    source = _thumbnail_source(person_id)
+    return source[2] if source else None
+
+
+def get_cached_ms_person_thumbnail(person_id: int) -> Optional[tuple[str, bytes]]:
+    """
+    Get the thumbnail for an MS Photos person through the on-disk cache.
     
-    if not filename or not rect:
+    Returns (cache_key, JPEG bytes), or None if no thumbnail can be made.
+    The key is derived from the face rect and the source photo's mtime, so
+    it can be used as an ETag.
+    """
+    source = _thumbnail_source(person_id)
+    
+    if not source:
+        return None
+    
+    windows_path, rect, key = source
+    cached = _read_cached_thumbnail(key)
+    if cached:
+        return key, cached
+    
+    thumb_bytes = _crop_face_from_local_image(windows_path, rect)
+    
+    if not thumb_bytes:
         return None
     
-    # Find the image path in Immich
-    photo_paths = get_immich_photo_paths()
-    image_path = photo_paths.get(filename)
+    _write_cached_thumbnail(key, thumb_bytes)
+    return key, thumb_bytes
+
+
+def get_cached_ms_person_thumbnails(person_ids: list[int]) -> dict[int, tuple[str, bytes]]:
+    """
+    Get thumbnails for several MS Photos people at once.
+    
+    Uses the disk cache like get_cached_ms_person_thumbnail, but people whose
+    best face is on the same photo share a single decode of that photo, and
+    different photos are processed in parallel (Pillow and libjpeg release
+    the GIL while decoding and resizing). Returns person_id -> (cache_key,
+    JPEG bytes); people without a thumbnail are left out of the result.
+    """
+    thumbnails = {}
+    misses_by_path = defaultdict(list)  # windows_path -> [(person_id, rect, key), ...]
+    
+    for person_id in dict.fromkeys(person_ids):
+        source = _thumbnail_source(person_id)
+        if not source:
+            continue
+        
+        windows_path, rect, key = source
+        cached = _read_cached_thumbnail(key)
+        if cached:
+            thumbnails[person_id] = (key, cached)
+        else:
+            misses_by_path[windows_path].append((person_id, rect, key))
+    
+    def generate(windows_path: str, faces: list) -> list[tuple[int, tuple[str, bytes]]]:
+        thumb_bytes_list = _crop_faces_from_local_image(windows_path, [rect for _, rect, _ in faces])
+        generated = []
+        for (person_id, _, key), thumb_bytes in zip(faces, thumb_bytes_list):
+            if thumb_bytes:
+                _write_cached_thumbnail(key, thumb_bytes)
+                generated.append((person_id, (key, thumb_bytes)))
+        return generated
+    
+    if len(misses_by_path) == 1:
+        results = [generate(*next(iter(misses_by_path.items())))]
+    else:
+        executor = _get_thumbnail_executor()
+        futures = [executor.submit(generate, windows_path, faces) for windows_path, faces in misses_by_path.items()]
+        results = (future.result() for future in as_completed(futures))
+    
+    for generated in results:
+        thumbnails.update(generated)
+    
+    return thumbnails
+
+
+def get_ms_person_thumbnails_batch(person_ids: list[int]) -> dict[int, str]:
+    """Base64-encoded get_cached_ms_person_thumbnails, for JSON consumers."""
+    return {
+        person_id: base64.b64encode(thumb_bytes).decode()
+        for person_id, (_, thumb_bytes) in get_cached_ms_person_thumbnails(person_ids).items()
+    }
+
+
+# Sprite sheets: many face thumbnails in one JPEG, one THUMBNAIL_SIZE square tile per face
+SPRITE_DEFAULT_COLUMNS = 10
+SPRITE_MAX_FACES = 1000  # bounds the memory used to compose one sheet
+SPRITE_MAX_TILES_PER_SIDE = 65500 // THUMBNAIL_SIZE  # libjpeg's maximum image dimension
+
+
+def _sprite_cache_name(sprite_key: str) -> str:
+    """Disk cache entry of a sprite sheet (shares the thumbnail cache and its sweep)."""
+    return f"sprite-{sprite_key}"
+
+
+def _compose_sprite(thumbnails: list[bytes], columns: int) -> bytes:
+    """Paste JPEG thumbnails row by row into a single JPEG, each centered in its tile."""
+    rows = math.ceil(len(thumbnails) / columns)
+    sheet = np.zeros((rows * THUMBNAIL_SIZE, columns * THUMBNAIL_SIZE, 3), dtype=np.uint8)
+    
+    for i, thumb_bytes in enumerate(thumbnails):
+        with Image.open(BytesIO(thumb_bytes)) as img:
+            tile = np.asarray(_as_rgb(img))
+        height, width = tile.shape[:2]
+        top = (i // columns) * THUMBNAIL_SIZE + (THUMBNAIL_SIZE - height) // 2
+        left = (i % columns) * THUMBNAIL_SIZE + (THUMBNAIL_SIZE - width) // 2
+        sheet[top:top + height, left:left + width] = tile
     
-    if not image_path:
+    return _encode_jpeg(sheet)
+
+
+def build_ms_thumbnail_sprite(person_ids: list[int], columns: int = SPRITE_DEFAULT_COLUMNS) -> Optional[tuple[str, list[dict]]]:
+    """
+    Combine the thumbnails of several MS Photos people into one sprite sheet.
+    
+    Faces are laid out left to right, top to bottom in THUMBNAIL_SIZE square
+    tiles, in the order given. Returns (sprite_key, positions) where positions
+    holds {"person_id", "x", "y"} for each tile's top-left corner; people
+    without a thumbnail are skipped. The sheet itself is stored in the disk
+    cache and fetched with get_ms_thumbnail_sprite(sprite_key). The key is
+    derived from the thumbnails' cache keys, so an unchanged set of faces
+    reuses the same sheet. Returns None if no thumbnail could be made.
+    """
+    person_ids = list(dict.fromkeys(person_ids))
+    if len(person_ids) > SPRITE_MAX_FACES:
+        raise ValueError(f"A sprite sheet holds at most {SPRITE_MAX_FACES} faces")
+    if not 1 <= columns <= SPRITE_MAX_TILES_PER_SIDE:
+        raise ValueError(f"columns must be between 1 and {SPRITE_MAX_TILES_PER_SIDE}")
+    if math.ceil(len(person_ids) / columns) > SPRITE_MAX_TILES_PER_SIDE:
+        raise ValueError(f"A sprite sheet holds at most {SPRITE_MAX_TILES_PER_SIDE} rows; use more columns")
+    
+    thumbnails = get_cached_ms_person_thumbnails(person_ids)
+    person_ids = [person_id for person_id in person_ids if person_id in thumbnails]
+    if not person_ids:
         return None
     
-    thumb_bytes = crop_face_from_image(image_path, rect)
+    columns = min(columns, len(person_ids))
+    sprite_key = hashlib.sha1(
+        f"{columns}:{','.join(thumbnails[person_id][0] for person_id in person_ids)}".encode()
+    ).hexdigest()
+    
+    if not (get_settings().thumbnail_cache_path / f"{_sprite_cache_name(sprite_key)}.jpg").is_file():
+        sprite_bytes = _compose_sprite([thumbnails[person_id][1] for person_id in person_ids], columns)
+        _write_cached_thumbnail(_sprite_cache_name(sprite_key), sprite_bytes)
     
-    if thumb_bytes:
-        return base64.b64encode(thumb_bytes).decode()
+    positions = [
+        {"person_id": person_id, "x": (i % columns) * THUMBNAIL_SIZE, "y": (i // columns) * THUMBNAIL_SIZE}
+        for i, person_id in enumerate(person_ids)
+    ]
+    return sprite_key, positions
+
+
+def get_ms_thumbnail_sprite(sprite_key: str) -> Optional[bytes]:
+    """JPEG bytes of a sprite sheet made by build_ms_thumbnail_sprite, or None if unknown."""
+    if not re.fullmatch(r"[0-9a-f]{40}", sprite_key):
+        return None
+    return _read_cached_thumbnail(_sprite_cache_name(sprite_key))
+
+
+def get_ms_person_thumbnail_bytes(person_id: int) -> Optional[bytes]:
+    """
+    Get the JPEG thumbnail for an MS Photos person.
     
-    return None
+    Returns the "best face" image cropped from the original photo.
+    """
+    result = get_cached_ms_person_thumbnail(person_id)
+    return result[1] if result else None
+
+
+def get_ms_person_thumbnail(person_id: int) -> Optional[str]:
+    """Base64-encoded get_ms_person_thumbnail_bytes, for JSON consumers."""
+    thumb_bytes = get_ms_person_thumbnail_bytes(person_id)
+    return base64.b64encode(thumb_bytes).decode() if thumb_bytes else None
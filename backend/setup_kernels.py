@@ -0,0 +1,19 @@
+"""
+Build the optional Cython matching kernel (services/_match_kernel.pyx).
+
+Usage (from the backend directory):
+    pip install cython
+    python setup_kernels.py build_ext --inplace
+
+The app runs without it; face matching then uses the pure Python/NumPy code.
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+
+setup(
+    name="face-match-kernels",
+    ext_modules=cythonize("services/_match_kernel.pyx"),
+    zip_safe=False,
+)
@@ -1,6 +1,6 @@
 // API Client
 
-import type { SystemStatus, MatchingResult, ValidationResult, ApplyResult, PersonMatch, MergeAnalysisResult, MatchDetailsResult, UnmatchedResult, AnalyticsResult, UnclusteredPreviewResult, ApplyUnclusteredResult, FullAnalysisResult, UnclusteredDetailsResult, UnrecognizedPreviewResult, UnrecognizedDetailsResult, CreateFaceItem, CreateFacesResult, AppConfig, ConfigUpdateResult } from './types';
+import type { SystemStatus, MatchingResult, ValidationResult, ApplyResult, PersonMatch, MergeAnalysisResult, MatchDetailsResult, UnmatchedResult, AnalyticsResult, UnclusteredPreviewResult, ApplyUnclusteredResult, FullAnalysisResult, UnclusteredDetailsResult, UnrecognizedPreviewResult, UnrecognizedDetailsResult, CreateFaceItem, CreateFacesResult, AppConfig, ConfigUpdateResult, MSThumbnailSprite } from './types';
 
 const API_BASE = '/api';
 
@@ -123,6 +123,14 @@ export function getMSThumbnailUrl(personId: number): string {
   return `${API_BASE}/thumbnails/ms/${personId}`;
 }
 
+// One sprite sheet for many MS Photos faces; render tiles with CSS background-position
+export async function getMSThumbnailSprite(personIds: number[], columns?: number): Promise<MSThumbnailSprite> {
+  return fetchAPI('/thumbnails/ms/sprite', {
+    method: 'POST',
+    body: JSON.stringify({ person_ids: personIds, columns }),
+  });
+}
+
 export function getImmichThumbnailUrl(personId: string): string {
   return `${API_BASE}/thumbnails/immich/${personId}`;
 }
@@ -8,6 +8,7 @@
 import { createContext, useContext, useState, useCallback, useEffect, type ReactNode } from 'react';
 import type {
   RawFaceMatch,
+  RawFaceMatchColumns,
   PersonMatch,
   PersonApplyPreview,
   ClusterIssue,
@@ -186,6 +187,18 @@ function saveThresholds(minIoU: number, maxCenterDist: number) {
   }
 }
 
+function rawMatchesFromColumns(columns: RawFaceMatchColumns): RawFaceMatch[] {
+  return columns.iou.map((iou, i) => ({
+    ms_person_id: columns.ms_person_id[i],
+    ms_person_name: columns.ms_person_name[i],
+    immich_cluster_id: columns.immich_cluster_id[i],
+    immich_cluster_name: columns.immich_cluster_name[i],
+    iou,
+    center_dist: columns.center_dist[i],
+    filename: columns.filename[i],
+  }));
+}
+
 // ============================================================================
 // Provider
 // ============================================================================
@@ -250,7 +263,7 @@ export function MatchingProvider({ children }: { children: ReactNode }) {
         loading: false,
         algorithmRunning: false,
         lastRun: isInitialRun ? new Date() : prev.lastRun,
-        rawMatches: result.analytics.raw_matches,
+        rawMatches: rawMatchesFromColumns(result.analytics.raw_matches),
         histograms: result.analytics.histograms,
         percentiles: result.analytics.percentiles,
         suggestedThresholds: result.analytics.suggested_thresholds,
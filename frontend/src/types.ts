@@ -189,6 +189,17 @@ export interface UnmatchedResult {
   };
 }
 
+// Sprite sheet of MS Photos face thumbnails; x/y are each tile's top-left corner
+export interface MSThumbnailSprite {
+  atlas_url: string;
+  tile_size: number;
+  positions: {
+    person_id: number;
+    x: number;
+    y: number;
+  }[];
+}
+
 // Analytics types
 export interface RawFaceMatch {
   ms_person_id: number;
@@ -200,6 +211,9 @@ export interface RawFaceMatch {
   filename: string;
 }
 
+// raw_matches as sent by the backend: one array per RawFaceMatch field
+export type RawFaceMatchColumns = { [K in keyof RawFaceMatch]: RawFaceMatch[K][] };
+
 export interface HistogramData {
   bins: number[];
   counts: number[];
@@ -224,7 +238,7 @@ export interface CumulativeData {
 }
 
 export interface AnalyticsResult {
-  raw_matches: RawFaceMatch[];
+  raw_matches: RawFaceMatchColumns;
   histograms: {
     iou: HistogramData;
     center_dist: HistogramData;
@@ -342,7 +356,7 @@ export interface ApplyUnclusteredResult {
 
 export interface FullAnalysisResult {
   analytics: {
-    raw_matches: RawFaceMatch[];
+    raw_matches: RawFaceMatchColumns;
     histograms: {
       iou: HistogramData;
       center_dist: HistogramData;